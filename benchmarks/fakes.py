@@ -0,0 +1,238 @@
+"""Fake Discord gateway and HTTP layer for offline benchmarks
+
+The bot is wired to a FakeHTTPClient that answers every REST call locally,
+and gateway events are fed straight into discord.py's parsers, so the full
+path from event parsing through cogs and the database runs without a
+connection to Discord.
+"""
+
+import asyncio
+from collections import Counter
+from datetime import datetime
+from itertools import count
+from typing import List, Optional
+
+from discord import ClientUser
+from discord.http import HTTPClient, Route
+
+
+snowflakes = count(700000000000000000)
+
+
+def snowflake() -> int:
+    return next(snowflakes)
+
+
+def timestamp() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def user_payload(id: int, name: str, bot: bool = False) -> dict:
+    return {
+        "id": str(id),
+        "username": name,
+        "discriminator": f"{id % 10000:04}",
+        "avatar": None,
+        "bot": bot,
+    }
+
+
+def member_payload(user: dict, **extra) -> dict:
+    return {
+        "user": user,
+        "roles": [],
+        "nick": None,
+        "joined_at": timestamp(),
+        "deaf": False,
+        "mute": False,
+        **extra,
+    }
+
+
+def guild_payload(id: int, owner: dict, channel_id: int, members: List[dict]) -> dict:
+    return {
+        "id": str(id),
+        "name": "Benchmark",
+        "owner_id": owner["id"],
+        "region": "europe",
+        "afk_timeout": 300,
+        "verification_level": 0,
+        "default_message_notifications": 0,
+        "explicit_content_filter": 0,
+        "mfa_level": 0,
+        "premium_tier": 0,
+        "system_channel_flags": 0,
+        "large": False,
+        "unavailable": False,
+        "features": [],
+        "emojis": [],
+        "voice_states": [],
+        "presences": [],
+        "member_count": len(members),
+        "members": [member_payload(i) for i in members],
+        "roles": [
+            {
+                # @everyone, administrator so every permission check passes
+                "id": str(id),
+                "name": "@everyone",
+                "permissions": 8,
+                "position": 0,
+                "color": 0,
+                "hoist": False,
+                "managed": False,
+                "mentionable": False,
+            }
+        ],
+        "channels": [
+            {
+                "id": str(channel_id),
+                "type": 0,
+                "name": "general",
+                "position": 0,
+                "permission_overwrites": [],
+                "nsfw": False,
+                "topic": None,
+                "parent_id": None,
+            }
+        ],
+    }
+
+
+def message_payload(
+    guild_id: int, channel_id: int, author: dict, content: str, **extra
+) -> dict:
+    return {
+        "id": str(snowflake()),
+        "channel_id": str(channel_id),
+        "guild_id": str(guild_id),
+        "author": author,
+        "content": content,
+        "timestamp": timestamp(),
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "attachments": [],
+        "embeds": [],
+        "pinned": False,
+        "type": 0,
+        **extra,
+    }
+
+
+class FakeHTTPClient(HTTPClient):
+    """HTTPClient that answers every request locally
+
+    `latency` adds a simulated round-trip to every request.
+    """
+
+    def __init__(self, bot_user: dict, latency: float = 0.0, loop=None):
+        super().__init__(loop=loop)
+        self.bot_user = bot_user
+        self.latency = latency
+        self.requests = Counter()
+
+    async def static_login(self, token, *, bot):
+        return self.bot_user
+
+    async def close(self):
+        pass
+
+    async def request(self, route: Route, *, files=None, form=None, **kwargs):
+        self.requests[f"{route.method} {route.path}"] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        payload = kwargs.get("json") or {}
+
+        if route.path == "/channels/{channel_id}/messages":
+            return message_payload(
+                route.guild_id or 0,
+                route.channel_id,
+                self.bot_user,
+                payload.get("content") or "",
+                embeds=[payload["embed"]] if payload.get("embed") else [],
+            )
+        if route.path == "/channels/{channel_id}/messages/{message_id}":
+            return message_payload(
+                route.guild_id or 0,
+                route.channel_id,
+                self.bot_user,
+                payload.get("content") or "",
+                id=route.url.rsplit("/", 1)[-1],
+            )
+        if route.path == "/users/{user_id}":
+            user_id = int(route.url.rsplit("/", 1)[-1])
+            return user_payload(user_id, f"user{user_id}")
+
+        return None
+
+
+class FakeGateway:
+    """Builds a guild with synthetic members and feeds events into a bot"""
+
+    def __init__(self, bot, members: int = 100, http_latency: float = 0.0):
+        self.bot = bot
+        self.guild_id = snowflake()
+        self.channel_id = snowflake()
+        self.bot_user = user_payload(snowflake(), "Nagatoro", bot=True)
+        self.users = [user_payload(snowflake(), f"member{i}") for i in range(members)]
+
+        bot.http = FakeHTTPClient(self.bot_user, http_latency, loop=bot.loop)
+        bot._connection.http = bot.http
+        bot._connection.user = ClientUser(state=bot._connection, data=self.bot_user)
+        bot._connection._add_guild_from_data(
+            guild_payload(
+                self.guild_id,
+                self.users[0],
+                self.channel_id,
+                [self.bot_user, *self.users],
+            )
+        )
+        bot._ready.set()
+
+    @property
+    def guild(self):
+        return self.bot.get_guild(self.guild_id)
+
+    def message(self, author: dict, content: str) -> dict:
+        member = member_payload(author)
+        del member["user"]
+        return message_payload(
+            self.guild_id, self.channel_id, author, content, member=member
+        )
+
+    def reaction(self, user: dict, message_id: int, emoji: str = "✅") -> dict:
+        member = member_payload(user)
+        return {
+            "user_id": user["id"],
+            "channel_id": str(self.channel_id),
+            "message_id": str(message_id),
+            "guild_id": str(self.guild_id),
+            "emoji": {"id": None, "name": emoji},
+            "member": member,
+        }
+
+    def member_join(self, user: Optional[dict] = None) -> dict:
+        user = user or user_payload(snowflake(), "newcomer")
+        return {**member_payload(user), "guild_id": str(self.guild_id)}
+
+    def dispatch(self, event: str, data: dict) -> List[asyncio.Task]:
+        """Parse an event like the gateway would, returns the handler tasks"""
+
+        tasks = []
+        schedule_event = self.bot._schedule_event
+
+        def collect(*args, **kwargs):
+            task = schedule_event(*args, **kwargs)
+            tasks.append(task)
+            return task
+
+        self.bot._schedule_event = collect
+        try:
+            self.bot._connection.parsers[event](data)
+        finally:
+            del self.bot._schedule_event
+
+        return tasks
@@ -0,0 +1,264 @@
+"""Replay synthetic or recorded gateway traffic through a real Bot
+
+Every cog is loaded against a local SQLite database and a fake Discord
+layer (see benchmarks/fakes.py), then a stream of events is dispatched
+through discord.py's gateway parsers. Reports throughput, latency
+percentiles per event type, and database queries and HTTP requests per event.
+
+Usage:
+    python -m benchmarks.gateway_replay --events 5000 --concurrency 50
+    python -m benchmarks.gateway_replay --record traffic.jsonl
+    python -m benchmarks.gateway_replay --replay traffic.jsonl
+
+Run from the repository root, cogs are loaded from nagatoro/cogs/.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+from collections import Counter, defaultdict
+from time import perf_counter
+from typing import Dict, Iterator, List, Tuple
+
+from tortoise import Tortoise
+
+from nagatoro import Bot
+from nagatoro.db import init_database, instrument_client
+from nagatoro.objects import Config
+from benchmarks.fakes import FakeGateway
+
+
+prefix = "!"
+commands = [
+    "profile",
+    "balance",
+    "level",
+    "ranking",
+    "warns",
+    "mutes",
+    "mutes active",
+    "prefix",
+    "ping",
+    "uptime",
+    "help",
+    "help Social",
+]
+words = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do".split()
+
+
+class QueryCounter:
+    """Counts queries sent through a Tortoise connection"""
+
+    def __init__(self):
+        self.queries = 0
+
+    def instrument(self, connection):
+        instrument_client(connection, query=self._count)
+
+    def _count(self, query: str, elapsed: float):
+        self.queries += 1
+
+
+class ErrorCounter(logging.Handler):
+    """Collects exceptions from event handlers and commands
+
+    discord.py and Bot.on_command_error only log them, a run with errors
+    measured code paths that never completed.
+    """
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.errors = Counter()
+        self.examples: Dict[str, logging.LogRecord] = {}
+
+    def emit(self, record: logging.LogRecord):
+        if not record.exc_info:
+            return
+
+        exception = record.exc_info[1]
+        # Command errors come wrapped in CommandInvokeError
+        exception = getattr(exception, "original", exception)
+        key = f"{type(exception).__name__}: {exception}"
+        self.errors[key] += 1
+        self.examples.setdefault(key, record)
+
+    def report(self):
+        for key, amount in self.errors.most_common():
+            print(f"{amount:>7} x {key}")
+            print(logging.Formatter().formatException(self.examples[key].exc_info))
+            print()
+
+
+class ReplayBot(Bot):
+    # No gateway connection to measure heartbeats on
+    latency = 0.0
+
+    async def on_error(self, event_method, *args, **kwargs):
+        logging.getLogger(__name__).exception(f"Exception in {event_method}")
+
+
+def synthetic_events(
+    gateway: FakeGateway, amount: int, command_ratio: float, seed: int
+) -> Iterator[Tuple[str, dict]]:
+    """Chat messages, commands, reactions and member joins"""
+
+    rng = random.Random(seed)
+    last_message_id = None
+
+    for _ in range(amount):
+        author = rng.choice(gateway.users)
+        roll = rng.random()
+
+        if roll < command_ratio:
+            yield "MESSAGE_CREATE", gateway.message(
+                author, prefix + rng.choice(commands)
+            )
+        elif roll < 0.9:
+            content = " ".join(rng.choices(words, k=rng.randint(2, 12)))
+            data = gateway.message(author, content)
+            last_message_id = int(data["id"])
+            yield "MESSAGE_CREATE", data
+        elif roll < 0.97 and last_message_id:
+            yield "MESSAGE_REACTION_ADD", gateway.reaction(author, last_message_id)
+        else:
+            yield "GUILD_MEMBER_ADD", gateway.member_join()
+
+
+def recorded_events(path: str) -> Iterator[Tuple[str, dict]]:
+    with open(path) as file:
+        for line in file:
+            event = json.loads(line)
+            yield event["t"], event["d"]
+
+
+def event_name(event: str, data: dict) -> str:
+    if event != "MESSAGE_CREATE":
+        return event
+    if data["content"].startswith(prefix):
+        return f"command {data['content'][len(prefix):]}"
+    return "chat message"
+
+
+def percentile(values: List[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def setup_bot(database_url: str, members: int, http_latency: float):
+    config = Config()
+    config.prefix = prefix
+    # Action commands would hit Tenor
+    config.tenor_key = None
+    config.database_url = database_url
+
+    bot = ReplayBot(config, shard_count=1)
+    await init_database(database_url, create_schema=True)
+    gateway = FakeGateway(bot, members=members, http_latency=http_latency)
+    bot.load_cogs()
+
+    return bot, gateway
+
+
+async def replay(args):
+    database = os.path.join(tempfile.mkdtemp(), "benchmark.sqlite3")
+    bot, gateway = await setup_bot(
+        f"sqlite://{database}", args.members, args.http_latency
+    )
+    counter = QueryCounter()
+    counter.instrument(Tortoise.get_connection("default"))
+    errors = ErrorCounter()
+    logging.getLogger().addHandler(errors)
+
+    if args.replay:
+        events = list(recorded_events(args.replay))
+    else:
+        events = list(
+            synthetic_events(gateway, args.events, args.command_ratio, args.seed)
+        )
+
+    if args.record:
+        with open(args.record, "w") as file:
+            for event, data in events:
+                file.write(json.dumps({"t": event, "d": data}) + "\n")
+        print(f"Recorded {len(events)} events to {args.record}")
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def run(event: str, data: dict):
+        async with semaphore:
+            start = perf_counter()
+            tasks = gateway.dispatch(event, data)
+            await asyncio.gather(*tasks)
+            latencies[event_name(event, data)].append(perf_counter() - start)
+
+    # Warm up with a few events so first-use costs don't skew the numbers
+    for event, data in synthetic_events(gateway, 50, args.command_ratio, -1):
+        await run(event, data)
+    latencies.clear()
+    counter.queries = 0
+    bot.http.requests.clear()
+
+    start = perf_counter()
+    await asyncio.gather(*(run(event, data) for event, data in events))
+    elapsed = perf_counter() - start
+
+    for cog in list(bot.cogs):
+        bot.remove_cog(cog)
+    await Tortoise.close_connections()
+
+    if errors.errors:
+        errors.report()
+        sys.exit(
+            f"{sum(errors.errors.values())} events raised exceptions, "
+            f"the results would be meaningless"
+        )
+
+    total = sum(len(i) for i in latencies.values())
+    print(
+        f"{total} events in {elapsed:.2f}s, {total / elapsed:.0f} events/s, "
+        f"concurrency {args.concurrency}"
+    )
+    print(
+        f"{counter.queries / total:.2f} DB queries/event, "
+        f"{sum(bot.http.requests.values()) / total:.2f} HTTP requests/event"
+    )
+    print()
+    print(
+        f"{'event':<28} {'count':>7} "
+        f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    )
+    for name, values in sorted(latencies.items(), key=lambda i: -len(i[1])):
+        print(
+            f"{name:<28} {len(values):>7} "
+            + " ".join(
+                f"{percentile(values, p) * 1000:>8.2f}" for p in (0.5, 0.9, 0.99)
+            )
+            + f" {max(values) * 1000:>8.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--command-ratio", type=float, default=0.2)
+    parser.add_argument(
+        "--http-latency", type=float, default=0.0, help="simulated seconds per request"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--record", help="write the events to a JSON lines file")
+    parser.add_argument("--replay", help="replay events from a JSON lines file")
+    args = parser.parse_args()
+
+    asyncio.get_event_loop().run_until_complete(replay(args))
+
+
+if __name__ == "__main__":
+    main()
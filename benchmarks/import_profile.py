@@ -0,0 +1,129 @@
+"""Startup cost of loading every cog compared to LAZY_COGS
+
+Runs each mode in a fresh interpreter and reports how long load_cogs()
+took and how many modules were imported. Every load_extension call is
+timed on its own, with the modules it imported, at startup and, for the
+lazy mode, on first use. discord.py imports extensions through
+importlib.util, which `-X importtime` doesn't report.
+
+The manifest is written first (see `python nagatoro.py manifest`). A
+TENOR_KEY placeholder enables the Action cog like in production.
+
+Usage: python -m benchmarks.import_profile
+"""
+
+import json
+import os
+import subprocess
+import sys
+from time import perf_counter
+from typing import Dict
+
+
+modes = {
+    "all cogs": "false",
+    "lazy cogs": "true",
+}
+
+
+def timed_extensions(bot) -> Dict[str, dict]:
+    """Record the time and new modules of every load_extension call"""
+
+    loads = {}
+    load_extension = type(bot).load_extension.__get__(bot)
+
+    def load(name: str):
+        modules = set(sys.modules)
+        start = perf_counter()
+        load_extension(name)
+        loads[name] = {
+            "ms": (perf_counter() - start) * 1000,
+            "modules": len(set(sys.modules) - modules),
+        }
+
+    bot.load_extension = load
+    return loads
+
+
+def measure():
+    start = perf_counter()
+
+    from nagatoro import Bot
+    from nagatoro.objects import Config
+
+    imported = perf_counter()
+    bot = Bot(Config())
+    startup = timed_extensions(bot)
+    modules = len(sys.modules)
+    bot.load_cogs()
+    loaded = perf_counter()
+    result = {
+        "import_ms": (imported - start) * 1000,
+        "load_cogs_ms": (loaded - imported) * 1000,
+        "modules": len(sys.modules) - modules,
+        "cogs": len(bot.cogs),
+        "startup": startup,
+    }
+
+    first_use = timed_extensions(bot)
+    bot.load_all_lazy()
+    result["first_use"] = first_use
+
+    print(json.dumps(result), flush=True)
+
+
+def main():
+    from nagatoro.objects import Config
+    from nagatoro.utils.manifest import create_manifest
+
+    create_manifest(Config())
+    env = {**os.environ, "TENOR_KEY": os.environ.get("TENOR_KEY") or "benchmark"}
+
+    results = {}
+    for name, lazy in modes.items():
+        process = subprocess.run(
+            [sys.executable, "-m", "benchmarks.import_profile", "--measure"],
+            env={**env, "LAZY_COGS": lazy},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        results[name] = json.loads(process.stdout.strip().splitlines()[-1])
+
+    print(
+        f"{'mode':<12} {'import (ms)':>12} {'load_cogs (ms)':>15} "
+        f"{'modules':>8} {'cogs':>5}"
+    )
+    for name, result in results.items():
+        print(
+            f"{name:<12} {result['import_ms']:>12.1f} {result['load_cogs_ms']:>15.1f} "
+            f"{result['modules']:>8} {result['cogs']:>5}"
+        )
+
+    eager, lazy = results["all cogs"], results["lazy cogs"]
+    print()
+    print(f"{'extension':<28} {'all cogs':>16} {'lazy startup':>16} {'first use':>16}")
+    for extension in sorted(eager["startup"]):
+        print(
+            f"{extension:<28} "
+            + " ".join(
+                f"{i[extension]['ms']:>7.1f}ms {i[extension]['modules']:>3} mod"
+                if extension in i
+                else f"{'-':>16}"
+                for i in (eager["startup"], lazy["startup"], lazy["first_use"])
+            )
+        )
+
+    print()
+    print(
+        f"LAZY_COGS saves {eager['load_cogs_ms'] - lazy['load_cogs_ms']:.1f}ms "
+        f"and {eager['modules'] - lazy['modules']} modules in load_cogs, "
+        f"deferred to the first use of each cog"
+    )
+
+
+if __name__ == "__main__":
+    if "--measure" in sys.argv:
+        measure()
+    else:
+        main()
@@ -0,0 +1,118 @@
+"""CPU per gateway message with the default runtime and with FAST_RUNTIME
+
+Runs each mode in a fresh process, so the uvloop policy and the JSON codec
+patches don't leak between them. Every message is decoded from raw gateway
+JSON, parsed into discord.py models (see benchmarks/fakes.py), handled in a
+task of its own and answered with an encoded REST payload, which is the
+per-message work that doesn't depend on cogs or the database.
+
+Usage: python -m benchmarks.json_codec --messages 20000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from time import process_time
+
+
+modes = {
+    "stdlib json, asyncio": "false",
+    "fast runtime": "true",
+}
+
+
+def measure(messages: int):
+    import asyncio
+
+    import discord.gateway
+    import discord.utils
+
+    from nagatoro import Bot
+    from nagatoro.objects import Config
+    from nagatoro.utils import enable_fast_runtime
+    from benchmarks.fakes import FakeGateway
+
+    config = Config()
+    enabled = enable_fast_runtime() if config.fast_runtime else []
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    bot = Bot(config, shard_count=1)
+    gateway = FakeGateway(bot, members=100)
+    # No cogs are loaded, only the task a handler would run in is kept
+    bot.dispatch = lambda *args, **kwargs: None
+    parse = bot._connection.parsers["MESSAGE_CREATE"]
+
+    frames = [
+        json.dumps(
+            {
+                "op": 0,
+                "s": i,
+                "t": "MESSAGE_CREATE",
+                "d": gateway.message(
+                    gateway.users[i % len(gateway.users)], f"message {i} " * 8
+                ),
+            }
+        )
+        for i in range(messages)
+    ]
+    reply = {"content": "", "embed": {"title": "Profile", "fields": []}}
+
+    async def handle(data: dict):
+        discord.utils.to_json({**reply, "content": data["content"]})
+
+    async def run():
+        tasks = []
+        for frame in frames:
+            # What DiscordWebSocket.received_message does with a text frame
+            payload = discord.gateway.json.loads(frame)
+            parse(payload["d"])
+            tasks.append(loop.create_task(handle(payload["d"])))
+        await asyncio.gather(*tasks)
+
+    start = process_time()
+    loop.run_until_complete(run())
+    elapsed = process_time() - start
+
+    print(
+        json.dumps(
+            {"enabled": enabled, "us_per_message": elapsed / messages * 1_000_000}
+        ),
+        flush=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--messages", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'mode':<24} {'enabled':<16} {'CPU us/message':>15}")
+    for name, fast_runtime in modes.items():
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.json_codec",
+                "--measure",
+                str(args.messages),
+            ],
+            env={**os.environ, "FAST_RUNTIME": fast_runtime},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{name:<24} {', '.join(result['enabled']) or '-':<16} "
+            f"{result['us_per_message']:>15.1f}"
+        )
+
+
+if __name__ == "__main__":
+    if "--measure" in sys.argv:
+        measure(int(sys.argv[sys.argv.index("--measure") + 1]))
+    else:
+        main()
@@ -0,0 +1,83 @@
+"""Startup time and memory with different member cache settings
+
+Logs in with the TOKEN from .env once per mode, in a fresh process each
+time, and reports how long it took until the bot was ready, how many
+members ended up cached and the peak RSS. No cogs or database are loaded.
+
+Usage: python -m benchmarks.member_cache
+"""
+
+import json
+import os
+import subprocess
+import sys
+from resource import getrusage, RUSAGE_SELF
+from time import perf_counter
+
+
+modes = {
+    "full cache, chunk at startup": {
+        "MEMBER_CACHE": "",
+        "CHUNK_GUILDS_AT_STARTUP": "true",
+    },
+    "full cache, lazy chunking": {
+        "MEMBER_CACHE": "",
+        "CHUNK_GUILDS_AT_STARTUP": "false",
+    },
+    "joined only, lazy chunking": {
+        "MEMBER_CACHE": "joined",
+        "CHUNK_GUILDS_AT_STARTUP": "false",
+    },
+    "no cache, lazy chunking": {
+        "MEMBER_CACHE": "none",
+        "CHUNK_GUILDS_AT_STARTUP": "false",
+    },
+}
+
+
+def measure():
+    import asyncio
+
+    from nagatoro import Bot
+    from nagatoro.objects import Config
+
+    start = perf_counter()
+    bot = Bot(Config())
+
+    @bot.event
+    async def on_ready():
+        result = {
+            "seconds": round(perf_counter() - start, 2),
+            "guilds": len(bot.guilds),
+            "members": sum(len(i.members) for i in bot.guilds),
+            # ru_maxrss is in kilobytes on Linux
+            "rss_mb": round(getrusage(RUSAGE_SELF).ru_maxrss / 1024, 1),
+        }
+        print(json.dumps(result), flush=True)
+        await bot.close()
+
+    asyncio.get_event_loop().run_until_complete(bot.start(bot.config.token))
+
+
+def main():
+    print(f"{'mode':<32} {'ready (s)':>10} {'members':>10} {'rss (MB)':>10}")
+    for name, env in modes.items():
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.member_cache", "--measure"],
+            env={**os.environ, **env},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{name:<32} {result['seconds']:>10} "
+            f"{result['members']:>10} {result['rss_mb']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    if "--measure" in sys.argv:
+        measure()
+    else:
+        main()
@@ -1,30 +1,37 @@
 import logging
+import signal
 import sys
+from multiprocessing import Process
+from typing import List, Optional
 
 import asyncio
 from tortoise import Tortoise
 from discord import Activity
+from discord.http import HTTPClient
 
 from nagatoro import Bot
 from nagatoro.objects import Config
 from nagatoro.db import init_database
+from nagatoro.utils import setup_logging, enable_fast_runtime
+from nagatoro.utils.manifest import manifest_path, create_manifest
+from nagatoro import metrics
 
 
-logging.basicConfig(
-    stream=sys.stdout,
-    level=logging.INFO,
-    format="%(levelname)s:%(name)s:%(funcName)s:%(message)s",
-)
+log = logging.getLogger("nagatoro")
 
-bot = Bot(Config())
-db_url = (
-    f"mysql://{bot.config.db_user}:{bot.config.db_passwd}"
-    f"@{bot.config.db_url}/{bot.config.db_name}"
-)
 
-
-async def run():
-    await init_database(db_url)
+async def run(bot: Bot):
+    await init_database(bot.config.database_url, bot.config.replica_db_url)
+    metrics.instrument_database()
+    metrics.instrument_discord_http(bot.http)
+    if port := bot.config.metrics_port:
+        server = await metrics.start_server(bot.config.metrics_host, port)
+        # Frees the port, metrics stay readable until the drain is over
+        bot.add_shutdown_hook(server.cleanup)
+    if bot.loop_monitor:
+        bot.loop_monitor.start()
+    bot.cooldowns.start()
+    bot.leader.start()
 
     if status := bot.config.status:
         bot.activity = Activity(name=status, type=bot.config.status_type)
@@ -33,13 +40,132 @@ async def run():
     await bot.connect()
 
 
-if __name__ == "__main__":
-    loop = asyncio.get_event_loop()
+def start(
+    shard_ids: Optional[List[int]] = None,
+    shard_count: Optional[int] = None,
+    cluster: int = 0,
+):
+    # Cluster workers are forked from the launcher, so they need a loop and
+    # a log writer thread of their own before the bot picks one up.
+    config = Config()
+    log_listener = setup_logging(config)
+    if config.fast_runtime:
+        log.info(f"Fast runtime: {', '.join(enable_fast_runtime()) or 'unavailable'}")
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    bot = Bot(config, shard_ids=shard_ids, shard_count=shard_count)
+    if bot.config.metrics_port:
+        bot.config.metrics_port += cluster
+
+    runner = loop.create_task(run(bot))
+
+    def shutdown():
+        # connect() doesn't return on its own once the shards are closed
+        bot.shutdown().add_done_callback(lambda _: runner.cancel())
+
+    for i in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(i, shutdown)
+        except NotImplementedError:
+            # Windows, Ctrl+C raises KeyboardInterrupt instead
+            pass
 
     try:
-        loop.run_until_complete(run())
-    except KeyboardInterrupt:
-        loop.run_until_complete(Tortoise.close_connections())
-        loop.run_until_complete(bot.logout())
+        loop.run_until_complete(runner)
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
     finally:
+        loop.run_until_complete(bot.shutdown())
         loop.close()
+        log_listener.stop()
+
+
+async def recommended_shard_count(token: str) -> int:
+    http = HTTPClient()
+    try:
+        await http.static_login(token, bot=True)
+        shard_count, _ = await http.get_bot_gateway()
+        return shard_count
+    finally:
+        await http.close()
+
+
+async def create_schema(config: Config):
+    try:
+        await init_database(config.database_url, create_schema=True)
+    finally:
+        await Tortoise.close_connections()
+
+
+def launch_cluster(config: Config):
+    """Spread the shards over `config.clusters` worker processes
+
+    Every process runs its own Bot and event loop with a contiguous range of
+    shard ids. Workers that exit are started again.
+    """
+
+    shard_count = config.shard_count or asyncio.get_event_loop().run_until_complete(
+        recommended_shard_count(config.token)
+    )
+    clusters = min(config.clusters, shard_count)
+    per_cluster, extra = divmod(shard_count, clusters)
+
+    shard_ranges = []
+    first = 0
+    for i in range(clusters):
+        last = first + per_cluster + (1 if i < extra else 0)
+        shard_ranges.append(list(range(first, last)))
+        first = last
+
+    def spawn(i: int) -> Process:
+        process = Process(
+            target=start,
+            args=(shard_ranges[i], shard_count, i),
+            name=f"cluster-{i}",
+            daemon=True,
+        )
+        process.start()
+        log.info(f"Started cluster {i} with shards {shard_ranges[i]}")
+        return process
+
+    processes = [spawn(i) for i in range(clusters)]
+
+    def interrupt(*_):
+        raise KeyboardInterrupt
+
+    # Workers shut down gracefully on SIGTERM, pass it on to them
+    signal.signal(signal.SIGTERM, interrupt)
+
+    try:
+        while True:
+            for i, process in enumerate(processes):
+                process.join(timeout=5 / clusters)
+                if not process.is_alive():
+                    log.warning(
+                        f"Cluster {i} exited with code {process.exitcode}, restarting"
+                    )
+                    processes[i] = spawn(i)
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    config = Config()
+
+    if config.clusters > 1 or sys.argv[1:] in (["create-schema"], ["manifest"]):
+        log_listener = setup_logging(config)
+        try:
+            if sys.argv[1:] == ["create-schema"]:
+                asyncio.get_event_loop().run_until_complete(create_schema(config))
+            elif sys.argv[1:] == ["manifest"]:
+                create_manifest(config)
+                log.info(f"Wrote the cog manifest to {manifest_path}")
+            else:
+                launch_cluster(config)
+        finally:
+            log_listener.stop()
+    else:
+        start(shard_count=config.shard_count)
@@ -1,21 +1,44 @@
 import os
+import sys
+import asyncio
 import logging
-from time import time
+import importlib
+from collections import OrderedDict
+from time import time, perf_counter
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
 
-from discord import Color, Intents
+from discord import Color, Guild, Intents
 from discord.ext import commands
 from discord.ext.commands import Context, errors as cerrors
+from tortoise import Tortoise
 
-from nagatoro.utils import get_prefixes
-from nagatoro.objects import Config, Embed, HelpCommand
+from nagatoro.cache import (
+    UserCache,
+    UserVersionConflict,
+    ActiveMuteIndex,
+    BanCache,
+    GuildSettingsCache,
+    ModeratorCache,
+    CooldownStore,
+    SQLiteCooldowns,
+)
+from nagatoro.utils import get_prefixes, close_session, LeaderElection
+from nagatoro.utils.reloader import ModuleReloader, ReloadResult
+from nagatoro.utils.manifest import lazy_extensions
+from nagatoro.metrics import track_command, cache_warmup_duration, LoopMonitor
+from nagatoro.objects import Config, Embed, HelpCommand, HelpPage
 from nagatoro.checks.is_moderator import NotModerator
 
 
 log = logging.getLogger(__name__)
 
 
-class Bot(commands.Bot):
+class Bot(commands.AutoShardedBot):
     def __init__(self, config: Config, **kwargs):
+        if config.member_cache_flags is not None:
+            # Left out otherwise, discord.py then derives them from the intents
+            kwargs.setdefault("member_cache_flags", config.member_cache_flags)
+
         super().__init__(
             command_prefix=get_prefixes,
             help_command=HelpCommand(),
@@ -25,41 +48,308 @@ class Bot(commands.Bot):
                 guilds=True,
                 messages=True,
                 members=True,
+                bans=True,
                 reactions=True,
             ),
+            chunk_guilds_at_startup=config.chunk_guilds_at_startup,
             **kwargs,
         )
         self.config = config
         self.start_timestamp = time()
+        self.user_cache = UserCache(config.user_cache_size)
+        self.active_mutes = ActiveMuteIndex()
+        self.bans = BanCache()
+        self.guild_settings = GuildSettingsCache(config.guild_cache_size)
+        self.moderators = ModeratorCache(config.guild_cache_size)
+        self.cooldowns = CooldownStore(
+            SQLiteCooldowns(config.cooldown_db) if config.cooldown_db else None,
+            config.cooldown_sync_interval,
+        )
+        self._warmed_up = False
+        self._tasks: Set[asyncio.Task] = set()
+        self._shutdown_hooks: List[Callable[[], Awaitable]] = []
+        self._shutdown: Optional[asyncio.Task] = None
+        self._chunked_guilds: Set[int] = set()
+        self.reloader = ModuleReloader()
+        # Rendered help pages by (prefix, help command name, target)
+        self.help_cache: "OrderedDict[Tuple[str, ...], HelpPage]" = OrderedDict()
+        # Extensions registered from the manifest but not imported yet
+        self._lazy: Dict[str, dict] = {}
+        self._lazy_commands: Dict[str, str] = {}
+        self._lazy_listeners: Dict[str, List[Tuple[str, Callable]]] = {}
+        self.loop_monitor = None
+        if threshold := config.slow_callback_threshold:
+            self.loop_monitor = LoopMonitor(threshold=threshold)
+        self.add_shutdown_hook(self.cooldowns.close)
+        # Background tasks only handle the guilds of the shards led here
+        self.leader = LeaderElection(
+            "background", config.leader_lease_ttl, self.shard_ids, self.shard_count
+        )
+        self.add_shutdown_hook(self.leader.stop)
 
     def load_cogs(self):
         path = "nagatoro/cogs/"
         extensions = [
             path.replace("/", ".") + file.replace(".py", "")
             for file in os.listdir(path)
-            if os.path.isfile(f"{path}{file}")
+            if os.path.isfile(f"{path}{file}") and file.endswith(".py")
         ]
+        manifest = lazy_extensions() if self.config.lazy_cogs else {}
 
         for extension in extensions:
+            if extension in self._lazy or extension in self.extensions:
+                continue
+            if entry := manifest.get(extension):
+                self._register_lazy(extension, entry)
+                continue
+
             try:
                 self.load_extension(extension)
             except cerrors.ExtensionAlreadyLoaded:
                 pass
 
+        self.reloader.snapshot()
         log.info(f"Loaded {len(self.cogs)} cogs: {', '.join(self.cogs)}")
+        if self._lazy:
+            lazy = (", ".join(i["cogs"]) for i in self._lazy.values())
+            log.info(f"Loading on first use: {', '.join(lazy)}")
 
-    def reload_cogs(self):
-        for extension in list(self.extensions):
-            try:
-                self.reload_extension(extension)
-            except cerrors.ExtensionAlreadyLoaded:
-                pass
+    def _register_lazy(self, extension: str, entry: dict):
+        """Stand in for an extension's commands and listeners until it's used
+
+        Commands are looked up in get_context. Listener stubs import the
+        extension and pass the event that triggered it on to its cogs.
+        """
+
+        self._lazy[extension] = entry
+        for name in entry["commands"]:
+            self._lazy_commands[name] = extension
+
+        listeners = self._lazy_listeners[extension] = []
+        for event in entry["listeners"]:
+
+            async def listener(*args, event=event):
+                self.load_lazy(extension)
+                for cog in map(self.get_cog, entry["cogs"]):
+                    for name, method in cog.get_listeners() if cog else ():
+                        if name == event:
+                            await method(*args)
+
+            self.add_listener(listener, event)
+            listeners.append((event, listener))
+
+    def load_lazy(self, extension: str):
+        """Import an extension registered from the manifest, if it wasn't yet"""
+
+        if not (entry := self._lazy.pop(extension, None)):
+            return
+
+        for name in entry["commands"]:
+            self._lazy_commands.pop(name, None)
+        for event, listener in self._lazy_listeners.pop(extension):
+            self.remove_listener(listener, event)
+
+        start = perf_counter()
+        self.load_extension(extension)
+        log.info(
+            f"Loaded {', '.join(entry['cogs'])} on first use "
+            f"in {(perf_counter() - start) * 1000:.0f}ms"
+        )
+
+    def load_all_lazy(self):
+        for extension in list(self._lazy):
+            self.load_lazy(extension)
+
+    def add_cog(self, cog: commands.Cog):
+        super().add_cog(cog)
+        # Help pages list the cogs' commands
+        self.help_cache.clear()
+
+    def remove_cog(self, name: str):
+        super().remove_cog(name)
+        self.help_cache.clear()
+
+    def reload_cogs(self) -> ReloadResult:
+        """Reload the cogs whose files changed, or whose imports did
+
+        Changed helper modules are reloaded before the cogs using them, see
+        nagatoro.utils.reloader for the ones that need a restart instead.
+        Other cogs keep running untouched. Cooldowns live in bot.cooldowns,
+        so reloaded commands keep them. New cog files are loaded.
+        """
+
+        start = perf_counter()
+        changed = self.reloader.changed()
+        order = self.reloader.reload_order(changed)
+        modules = [i for i in order if i not in self.extensions]
+        extensions = [i for i in order if i in self.extensions]
+
+        for module in modules:
+            importlib.reload(sys.modules[module])
+
+        for extension in extensions:
+            self.reload_extension(extension)
+
+        loaded = set(self.extensions)
+        self.load_cogs()
+        result = ReloadResult(
+            changed=changed,
+            modules=modules,
+            extensions=extensions + [i for i in self.extensions if i not in loaded],
+            skipped=[i for i in changed if i not in order],
+            seconds=perf_counter() - start,
+        )
+        log.info(
+            f"Reloaded {len(result.extensions)} cogs and {len(modules)} modules "
+            f"in {result.seconds * 1000:.0f}ms"
+        )
+        if result.skipped:
+            log.warning(f"Restart to apply changes to {', '.join(result.skipped)}")
+
+        return result
+
+    async def ensure_chunked(self, guild: Guild):
+        """Download the guild's member list if it wasn't yet
+
+        Only needed when guilds aren't chunked at startup or members aren't
+        cached. Every guild is requested once, after that the member cache
+        is kept current by member events (if enabled).
+        """
+
+        if guild.chunked or guild.id in self._chunked_guilds:
+            return
+
+        self._chunked_guilds.add(guild.id)
+        try:
+            await guild.chunk(cache=True)
+        except Exception:
+            self._chunked_guilds.discard(guild.id)
+            raise
+
+    def owns_guild(self, guild_id: int) -> bool:
+        """Whether the guild belongs to one of this process' shards"""
+
+        if self.shard_ids is None:
+            return True
+
+        return (guild_id >> 22) % self.shard_count in self.shard_ids
+
+    async def warm_up_caches(self):
+        """Bulk load guild settings, moderators and active mutes
 
-        log.info(f"Reloaded {len(self.extensions)} cogs")
+        Without this every guild's first messages after a restart would each
+        query the database for the same rows at once.
+        """
+
+        guild_ids = [i.id for i in self.guilds]
+
+        async def timed(name: str, cache):
+            start = perf_counter()
+            await cache.load(guild_ids)
+            cache_warmup_duration.observe(perf_counter() - start, cache=name)
+
+        start = perf_counter()
+        try:
+            await asyncio.gather(
+                timed("guild_settings", self.guild_settings),
+                timed("moderators", self.moderators),
+                timed("active_mutes", self.active_mutes),
+            )
+        except Exception:
+            # Caches that didn't load fall back to loading on first use
+            log.exception("Cache warm-up failed")
+            return
+
+        elapsed = perf_counter() - start
+        cache_warmup_duration.observe(elapsed, cache="total")
+        log.info(f"Warmed up caches for {len(guild_ids)} guilds in {elapsed:.2f}s")
 
     async def on_ready(self):
         log.info(f"Bot ready as {self.user} with prefix {self.config.prefix}")
 
+        # on_ready fires again after reconnecting, the caches are kept
+        if not self._warmed_up:
+            self._warmed_up = True
+            self._track(self.loop.create_task(self.warm_up_caches()))
+
+    async def on_guild_join(self, guild: Guild):
+        # Mutes from before the bot was removed are still active
+        await self.active_mutes.load([guild.id])
+
+    async def on_guild_available(self, guild: Guild):
+        if not self._warmed_up:
+            # Guilds available at startup are loaded in bulk after on_ready
+            return
+
+        # Back from an outage or on a shard that connected late. Mutes
+        # could have been added in the meantime, loading merges them.
+        await self.active_mutes.load([guild.id])
+
+    def _schedule_event(self, coro, event_name, *args, **kwargs):
+        # Every event handler task is tracked, so shutdown can wait for them
+        return self._track(super()._schedule_event(coro, event_name, *args, **kwargs))
+
+    def _track(self, task: asyncio.Task) -> asyncio.Task:
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def add_shutdown_hook(self, hook: Callable[[], Awaitable]):
+        """Await `hook` on shutdown, before the connections are closed
+
+        Hooks run after event handlers finished, buffered database writes
+        should be flushed from one.
+        """
+
+        self._shutdown_hooks.append(hook)
+
+    def shutdown(self) -> asyncio.Task:
+        """Start shutting down, returns the task doing it
+
+        Calling it again returns the same task.
+        """
+
+        if self._shutdown is None:
+            self._shutdown = self.loop.create_task(self._shut_down())
+
+        return self._shutdown
+
+    async def _shut_down(self):
+        timeout = self.config.shutdown_timeout
+        deadline = self.loop.time() + timeout
+        log.info(f"Shutting down, waiting up to {timeout}s for running tasks")
+
+        # Stop intake: cogs stop their loops in on_shutdown and the gateway
+        # is disconnected. The REST client stays open for running commands.
+        self.dispatch("shutdown")
+        for shard in self.shards.values():
+            await shard.disconnect()
+
+        while self._tasks:
+            _, pending = await asyncio.wait(
+                set(self._tasks), timeout=max(0.0, deadline - self.loop.time())
+            )
+            if pending and self.loop.time() >= deadline:
+                log.warning(f"Cancelling {len(pending)} tasks still running")
+                for task in pending:
+                    task.cancel()
+                await asyncio.wait(pending)
+                break
+
+        for hook in self._shutdown_hooks:
+            try:
+                await hook()
+            except Exception:
+                log.exception(f"Shutdown hook {hook.__qualname__} failed")
+
+        await close_session()
+        await self.close()
+        await Tortoise.close_connections()
+        if self.loop_monitor:
+            self.loop_monitor.stop()
+
+        log.info("Shut down")
+
     async def on_message(self, message):
         if message.author.bot or not message.guild:
             return
@@ -72,6 +362,23 @@ class Bot(commands.Bot):
 
         await self.process_commands(message)
 
+    async def get_context(self, message, *, cls=Context):
+        ctx = await super().get_context(message, cls=cls)
+        if ctx.command is None and ctx.invoked_with:
+            if extension := self._lazy_commands.get(ctx.invoked_with.lower()):
+                self.load_lazy(extension)
+                ctx = await super().get_context(message, cls=cls)
+
+        return ctx
+
+    async def invoke(self, ctx: Context):
+        if ctx.command is None:
+            return await super().invoke(ctx)
+
+        # Times checks, conversion and the command itself, errors included
+        with track_command(ctx):
+            await super().invoke(ctx)
+
     async def on_command_error(self, ctx: Context, exception: Exception):
         title = "Error"
 
@@ -97,6 +404,8 @@ class Bot(commands.Bot):
             title = "Channel is not NSFW"
         except cerrors.CommandOnCooldown:
             title = "Cooldown"
+        except UserVersionConflict:
+            title = "Profile changed"
         except Exception:
             log.exception(exception)
 
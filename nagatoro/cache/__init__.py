@@ -0,0 +1,6 @@
+from .user_cache import UserCache, UserVersionConflict
+from .active_mutes import ActiveMuteIndex
+from .bans import BanCache
+from .guild_settings import GuildSettingsCache
+from .moderators import ModeratorCache
+from .cooldowns import CooldownStore, SQLiteCooldowns
@@ -0,0 +1,48 @@
+from typing import Iterable, Set, Tuple
+
+from nagatoro.db import Mute
+from .bulk import in_chunks
+
+
+class ActiveMuteIndex:
+    """In-memory set of (guild id, user id) pairs that have an active mute
+
+    Guilds are loaded as they become available. Lookups in a guild that
+    isn't loaded count as possible hits, so callers fall back to the
+    database.
+    """
+
+    def __init__(self):
+        self._guilds: Set[int] = set()
+        self._mutes: Set[Tuple[int, int]] = set()
+
+    def __len__(self):
+        return len(self._mutes)
+
+    def is_loaded(self, guild_id: int) -> bool:
+        return guild_id in self._guilds
+
+    async def load(self, guild_ids: Iterable[int]):
+        """Load the active mutes of the given guilds"""
+
+        for chunk in in_chunks(guild_ids):
+            rows = await Mute.filter(active=True, guild_id__in=chunk).values_list(
+                "guild_id", "user_id"
+            )
+            # Merge instead of replacing, mutes could have been added
+            # while the query was running.
+            self._mutes.update((guild_id, user_id) for guild_id, user_id in rows)
+            self._guilds.update(chunk)
+
+    def unload(self, guild_id: int):
+        self._guilds.discard(guild_id)
+        self._mutes = {i for i in self._mutes if i[0] != guild_id}
+
+    def add(self, guild_id: int, user_id: int):
+        self._mutes.add((guild_id, user_id))
+
+    def discard(self, guild_id: int, user_id: int):
+        self._mutes.discard((guild_id, user_id))
+
+    def might_be_muted(self, guild_id: int, user_id: int) -> bool:
+        return guild_id not in self._guilds or (guild_id, user_id) in self._mutes
@@ -0,0 +1,38 @@
+from typing import Dict, Set
+
+from discord import Guild, User
+from discord.errors import NotFound
+
+
+class BanCache:
+    """Per-guild sets of banned user ids
+
+    The sets are filled from ban events and lookups and emptied by unban
+    events. A user missing from the set is checked with a single-ban request,
+    the guild's full ban list is never downloaded.
+    """
+
+    def __init__(self):
+        self._bans: Dict[int, Set[int]] = {}
+
+    def add(self, guild_id: int, user_id: int):
+        self._bans.setdefault(guild_id, set()).add(user_id)
+
+    def discard(self, guild_id: int, user_id: int):
+        if bans := self._bans.get(guild_id):
+            bans.discard(user_id)
+
+    def remove_guild(self, guild_id: int):
+        self._bans.pop(guild_id, None)
+
+    async def is_banned(self, guild: Guild, user: User) -> bool:
+        if user.id in self._bans.get(guild.id, ()):
+            return True
+
+        try:
+            await guild.fetch_ban(user)
+        except NotFound:
+            return False
+
+        self.add(guild.id, user.id)
+        return True
@@ -0,0 +1,11 @@
+from typing import Iterable, Iterator, List
+
+
+# Keeps IN (...) lists well under the database's packet and variable limits
+chunk_size = 500
+
+
+def in_chunks(ids: Iterable[int], size: int = chunk_size) -> Iterator[List[int]]:
+    ids = list(ids)
+    for i in range(0, len(ids), size):
+        yield ids[i : i + size]
@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from time import time
+from typing import Dict, List, Optional, Tuple
+
+from discord import Message
+from discord.ext.commands import Cooldown
+
+
+log = logging.getLogger(__name__)
+
+# Cooldown name and the BucketType key, as text so it can be stored
+BucketKey = Tuple[str, str]
+
+
+class TokenBucket:
+    """`rate` tokens, refilled continuously over `per` seconds"""
+
+    __slots__ = ("rate", "per", "tokens", "updated", "consumed")
+
+    def __init__(self, rate: int, per: float, now: float):
+        self.rate = rate
+        self.per = per
+        self.tokens = float(rate)
+        self.updated = now
+        # Tokens taken since the last sync, counted with a shared store only
+        self.consumed = 0
+
+    def refill(self, now: float):
+        elapsed = max(0.0, now - self.updated)
+        self.tokens = min(self.rate, self.tokens + elapsed * self.rate / self.per)
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Take a token, returns how long to wait if there's none"""
+
+        self.refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+
+        return (1 - self.tokens) * self.per / self.rate
+
+    @property
+    def full(self) -> bool:
+        return self.tokens >= self.rate and not self.consumed
+
+
+class SQLiteCooldowns:
+    """Shares cooldowns between processes on one host through a SQLite file
+
+    Every sync is one transaction in a worker thread, the event loop
+    never waits for the file lock.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(
+                self.path, timeout=10, isolation_level=None, check_same_thread=False
+            )
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS cooldowns ("
+                "name TEXT NOT NULL, key TEXT NOT NULL, tokens REAL NOT NULL, "
+                "updated REAL NOT NULL, full_at REAL NOT NULL, "
+                "PRIMARY KEY (name, key))"
+            )
+
+        return self._connection
+
+    def _sync(
+        self, buckets: List[Tuple[BucketKey, int, float, int]], now: float
+    ) -> Dict[BucketKey, float]:
+        connection = self._connect()
+        tokens = {}
+
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            for (name, key), rate, per, consumed in buckets:
+                row = connection.execute(
+                    "SELECT tokens, updated FROM cooldowns WHERE name = ? AND key = ?",
+                    (name, key),
+                ).fetchone()
+                stored = rate if row is None else row[0] + (now - row[1]) * rate / per
+                stored = min(rate, stored) - consumed
+                connection.execute(
+                    "INSERT OR REPLACE INTO cooldowns VALUES (?, ?, ?, ?, ?)",
+                    (name, key, stored, now, now + (rate - stored) * per / rate),
+                )
+                tokens[(name, key)] = stored
+
+            connection.execute("DELETE FROM cooldowns WHERE full_at < ?", (now,))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+        return tokens
+
+    async def sync(
+        self, buckets: List[Tuple[BucketKey, int, float, int]], now: float
+    ) -> Dict[BucketKey, float]:
+        """Add the tokens taken here, returns every bucket's shared tokens"""
+
+        return await asyncio.get_event_loop().run_in_executor(
+            self._executor, self._sync, buckets, now
+        )
+
+    async def close(self):
+        def close():
+            if self._connection:
+                self._connection.close()
+
+        await asyncio.get_event_loop().run_in_executor(self._executor, close)
+        self._executor.shutdown()
+
+
+class CooldownStore:
+    """Cooldowns kept as token buckets in memory, optionally shared
+
+    Checks only touch the in-process buckets. With a shared store, the
+    tokens taken are sent in one batch every `sync_interval` seconds and the
+    buckets are set to the combined count of all processes, so a user can
+    get at most one extra window of uses per process between syncs.
+
+    Full buckets are the same as missing ones and are dropped on every sync,
+    or every `prune_interval` seconds without a shared store. Past
+    `max_buckets` they're also dropped when a new bucket is added.
+    """
+
+    prune_interval = 60.0
+
+    def __init__(
+        self,
+        shared: Optional[SQLiteCooldowns] = None,
+        sync_interval: float = 1.0,
+        max_buckets: int = 100_000,
+    ):
+        self.shared = shared
+        self.sync_interval = sync_interval
+        self.max_buckets = max_buckets
+        self._buckets: Dict[BucketKey, TokenBucket] = {}
+        self._pruned = time()
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def hit(self, name: str, cooldown: Cooldown, message: Message) -> float:
+        """Use the cooldown, returns how long to wait if it's exhausted
+
+        Buckets are keyed like discord.py's, by `cooldown.type`.
+        """
+
+        key = (name, repr(cooldown.type.get_key(message)))
+        now = time()
+        if (bucket := self._buckets.get(key)) is None:
+            # At most once a second, the buckets could all be in use
+            if len(self._buckets) >= self.max_buckets and now - self._pruned > 1:
+                self.prune()
+            bucket = self._buckets[key] = TokenBucket(cooldown.rate, cooldown.per, now)
+
+        if not (retry_after := bucket.take(now)) and self.shared:
+            bucket.consumed += 1
+
+        return retry_after
+
+    def prune(self):
+        """Drop the full buckets, they're created again on next use"""
+
+        now = self._pruned = time()
+        for key, bucket in list(self._buckets.items()):
+            bucket.refill(now)
+            if bucket.full:
+                # With a shared store, other processes' uses show up on next use
+                del self._buckets[key]
+
+    def start(self):
+        if not self._task:
+            self._task = asyncio.ensure_future(self._maintain())
+
+    async def _maintain(self):
+        while True:
+            if not self.shared:
+                await asyncio.sleep(self.prune_interval)
+                self.prune()
+                continue
+
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+            except Exception:
+                log.exception("Syncing cooldowns failed")
+
+    async def sync(self):
+        self.prune()
+        now = self._pruned
+        buckets = {key: bucket.consumed for key, bucket in self._buckets.items()}
+        for bucket in self._buckets.values():
+            bucket.consumed = 0
+
+        try:
+            tokens = await self.shared.sync(
+                [
+                    (key, self._buckets[key].rate, self._buckets[key].per, consumed)
+                    for key, consumed in buckets.items()
+                ],
+                now,
+            )
+        except Exception:
+            # Counted again on the next sync
+            for key, consumed in buckets.items():
+                if bucket := self._buckets.get(key):
+                    bucket.consumed += consumed
+            raise
+
+        for key, shared_tokens in tokens.items():
+            if (bucket := self._buckets.get(key)) is None:
+                continue
+            # Tokens taken here while the sync ran aren't in the shared count
+            bucket.tokens = shared_tokens - bucket.consumed
+            bucket.updated = now
+            bucket.refill(time())
+
+    async def close(self):
+        """Stop syncing and send the last uses, a bot shutdown hook"""
+
+        if self._task:
+            self._task.cancel()
+        if not self.shared:
+            return
+
+        await self.sync()
+        await self.shared.close()
@@ -0,0 +1,99 @@
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Generic, Iterable, List, TypeVar
+
+from .bulk import in_chunks
+
+
+T = TypeVar("T")
+
+
+class GuildCache(Generic[T]):
+    """Bounded LRU of values loaded per guild
+
+    Concurrent misses for the same guild share one query. A guild that is
+    invalidated while a query for it runs doesn't get that query's result
+    stored, it could be older than the change that invalidated it.
+    """
+
+    def __init__(self, size: int = 10000):
+        self.size = size
+        self._values: "OrderedDict[int, T]" = OrderedDict()
+        self._pending: Dict[int, asyncio.Future] = {}
+        # Invalidations made while queries run, by the epoch they were made in
+        self._epoch = 0
+        self._running = 0
+        self._invalidated: Dict[int, int] = {}
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, guild_id: int):
+        return guild_id in self._values
+
+    async def _query(self, guild_id: int) -> T:
+        raise NotImplementedError
+
+    async def _query_many(self, guild_ids: List[int]) -> Dict[int, T]:
+        raise NotImplementedError
+
+    async def get(self, guild_id: int) -> T:
+        if (value := self._values.get(guild_id)) is not None:
+            self._values.move_to_end(guild_id)
+            return value
+
+        if guild_id not in self._pending:
+            self._pending[guild_id] = asyncio.ensure_future(self._load(guild_id))
+
+        return await asyncio.shield(self._pending[guild_id])
+
+    async def _load(self, guild_id: int) -> T:
+        started = self._start()
+        try:
+            value = await self._query(guild_id)
+            self._put(guild_id, value, started)
+            return value
+        finally:
+            self._finish()
+            # Unless invalidated and already replaced by a newer load
+            if self._pending.get(guild_id) is asyncio.current_task():
+                del self._pending[guild_id]
+
+    async def load(self, guild_ids: Iterable[int]):
+        """Load many guilds with bulk queries"""
+
+        for chunk in in_chunks(guild_ids):
+            started = self._start()
+            try:
+                for guild_id, value in (await self._query_many(chunk)).items():
+                    # Values loaded on first use in the meantime are as new
+                    if guild_id not in self._values:
+                        self._put(guild_id, value, started)
+            finally:
+                self._finish()
+
+    def invalidate(self, guild_id: int):
+        self._values.pop(guild_id, None)
+        # The next lookup doesn't wait for a query that may miss the change
+        self._pending.pop(guild_id, None)
+        if self._running:
+            self._invalidated[guild_id] = self._epoch
+            self._epoch += 1
+
+    def _start(self) -> int:
+        self._running += 1
+        return self._epoch
+
+    def _finish(self):
+        self._running -= 1
+        if not self._running:
+            self._invalidated.clear()
+
+    def _put(self, guild_id: int, value: T, started: int):
+        if self._invalidated.get(guild_id, -1) >= started:
+            return
+
+        self._values[guild_id] = value
+        self._values.move_to_end(guild_id)
+        while len(self._values) > self.size:
+            self._values.popitem(last=False)
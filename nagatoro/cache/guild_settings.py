@@ -0,0 +1,33 @@
+from typing import Dict, List
+
+from tortoise.exceptions import IntegrityError
+
+from nagatoro.db import Guild
+from .guild_cache import GuildCache
+
+
+class GuildSettingsCache(GuildCache[Guild]):
+    """Guild rows (prefix, mute role, level up messages) by guild id
+
+    Commands that change the settings save the row and invalidate the
+    guild, the next lookup reads it again.
+    """
+
+    async def _query(self, guild_id: int) -> Guild:
+        guild, _ = await Guild.get_or_create(id=guild_id)
+        return guild
+
+    async def _query_many(self, guild_ids: List[int]) -> Dict[int, Guild]:
+        """Creates missing rows"""
+
+        guilds = {i.id: i for i in await Guild.filter(id__in=guild_ids)}
+
+        if missing := [Guild(id=i) for i in guild_ids if i not in guilds]:
+            try:
+                await Guild.bulk_create(missing)
+            except IntegrityError:
+                # Created by a command in the meantime, those are loaded
+                # on first use instead.
+                missing = []
+
+        return {**guilds, **{i.id: i for i in missing}}
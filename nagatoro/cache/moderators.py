@@ -0,0 +1,31 @@
+from typing import Dict, List, Set
+
+from nagatoro.db import Moderator
+from .guild_cache import GuildCache
+
+
+class ModeratorCache(GuildCache[Set[int]]):
+    """Moderator user ids per guild
+
+    A guild's set is loaded whole on first use, commands that add or remove
+    moderators invalidate it.
+    """
+
+    async def _query(self, guild_id: int) -> Set[int]:
+        rows = await Moderator.filter(guild_id=guild_id).values_list(
+            "user_id", flat=True
+        )
+        return set(rows)
+
+    async def _query_many(self, guild_ids: List[int]) -> Dict[int, Set[int]]:
+        rows = await Moderator.filter(guild_id__in=guild_ids).values_list(
+            "guild_id", "user_id"
+        )
+        moderators = {i: set() for i in guild_ids}
+        for guild_id, user_id in rows:
+            moderators[guild_id].add(user_id)
+
+        return moderators
+
+    async def is_moderator(self, guild_id: int, user_id: int) -> bool:
+        return user_id in await self.get(guild_id)
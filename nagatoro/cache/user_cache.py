@@ -0,0 +1,109 @@
+import asyncio
+from collections import OrderedDict
+from typing import Dict
+
+from discord.ext.commands.errors import CommandError
+from tortoise.transactions import in_transaction
+
+from nagatoro.db import User
+
+
+# Columns written back on save, the id and version are handled separately
+_fields = ("exp", "level", "balance", "daily_streak", "last_daily")
+
+
+class UserVersionConflict(CommandError):
+    """Exception raised when a cached User row was changed by someone else."""
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        super().__init__(
+            "Your profile was changed in the meantime, please try again."
+        )
+
+
+class UserCache:
+    """Bounded LRU identity map of User rows
+
+    Every lookup of the same id returns the same User instance while it stays
+    in the cache, so concurrent commands work on one object. Saves are written
+    through to the database and guarded by the row's version column.
+    """
+
+    def __init__(self, size: int = 1024):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._users: "OrderedDict[int, User]" = OrderedDict()
+        self._pending: Dict[int, asyncio.Future] = {}
+
+    def __len__(self):
+        return len(self._users)
+
+    def __contains__(self, user_id: int):
+        return user_id in self._users
+
+    async def get(self, user_id: int) -> User:
+        if (user := self._users.get(user_id)) is not None:
+            self._users.move_to_end(user_id)
+            self.hits += 1
+            return user
+
+        self.misses += 1
+        # Concurrent misses for the same id share one query,
+        # otherwise they would end up with different instances.
+        if user_id not in self._pending:
+            self._pending[user_id] = asyncio.ensure_future(self._load(user_id))
+
+        return await asyncio.shield(self._pending[user_id])
+
+    async def save(self, *users: User):
+        """Write users back, raises UserVersionConflict if any row is stale
+
+        Multiple users are saved in one transaction, so either all of them
+        are written or none are.
+        """
+
+        try:
+            if len(users) == 1:
+                await self._write(users[0])
+            else:
+                async with in_transaction("default"):
+                    for user in users:
+                        await self._write(user)
+        except UserVersionConflict:
+            for user in users:
+                self.evict(user.id)
+            raise
+
+        for user in users:
+            user.version += 1
+            self._put(user)
+
+    def evict(self, user_id: int):
+        self._users.pop(user_id, None)
+
+    def clear(self):
+        self._users.clear()
+
+    async def _load(self, user_id: int) -> User:
+        try:
+            user, _ = await User.get_or_create(id=user_id)
+            self._put(user)
+            return user
+        finally:
+            del self._pending[user_id]
+
+    async def _write(self, user: User):
+        updated = await User.filter(id=user.id, version=user.version).update(
+            version=user.version + 1, **{i: getattr(user, i) for i in _fields}
+        )
+        if not updated:
+            raise UserVersionConflict(user.id)
+
+    def _put(self, user: User):
+        self._users[user.id] = user
+        self._users.move_to_end(user.id)
+
+        while len(self._users) > self.size:
+            self._users.popitem(last=False)
@@ -1 +1,2 @@
 from .is_moderator import is_moderator
+from .cooldown import cooldown
@@ -0,0 +1,23 @@
+from discord.ext.commands import BucketType, Context, Cooldown, check
+from discord.ext.commands.errors import CommandOnCooldown
+
+
+def cooldown(rate: int, per: float, type: BucketType = BucketType.default):
+    """discord.py's cooldown, kept in the bot's CooldownStore
+
+    With a shared store the cooldown holds across processes. Like other
+    checks it runs in decorator order, keep it below the permission checks
+    so failed checks don't use it up.
+    """
+
+    bucket = Cooldown(rate, per, type)
+
+    async def predicate(ctx: Context):
+        if retry_after := ctx.bot.cooldowns.hit(
+            ctx.command.qualified_name, bucket, ctx.message
+        ):
+            raise CommandOnCooldown(bucket, retry_after)
+
+        return True
+
+    return check(predicate)
@@ -1,7 +1,8 @@
 from asyncio import TimeoutError
 from discord.errors import Forbidden, NotFound
-from discord.ext.commands import Cog, Context, command, cooldown, BucketType
+from discord.ext.commands import Cog, Context, command, BucketType
 
+from nagatoro.checks import cooldown
 from nagatoro.objects import Embed
 from nagatoro.utils import get_gif
 
@@ -1,6 +1,5 @@
 from discord import Color
-from discord.ext.commands import Cog, Context, command, BucketType, \
-    CooldownMapping
+from discord.ext.commands import Cog, Context, command, BucketType, Cooldown
 from discord.ext.commands.errors import CommandOnCooldown
 
 from nagatoro.objects import Embed
@@ -25,14 +24,12 @@ class Anime(Cog):
 
     def __init__(self, bot):
         self.bot = bot
-        self._cooldown = CooldownMapping.from_cooldown(rate=5, per=20,
-                                                       type=BucketType.user)
+        self._cooldown = Cooldown(rate=5, per=20, type=BucketType.user)
 
     async def cog_before_invoke(self, ctx: Context):
         # Cog-wide cooldowns, every command is on a shared cooldown.
         # Will get removed if any command gets its own cooldown.
-        bucket = self._cooldown.get_bucket(ctx.message)
-        if retry_after := bucket.update_rate_limit():
+        if retry_after := self.bot.cooldowns.hit("anime", self._cooldown, ctx.message):
             raise CommandOnCooldown(self._cooldown, retry_after)
 
     @command(name="anilist", aliases=["al"])
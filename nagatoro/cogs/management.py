@@ -6,13 +6,13 @@ from discord.ext.commands import (
     group,
     is_owner,
     has_guild_permissions,
-    cooldown,
     BucketType,
 )
 
 from nagatoro.objects import Embed
-from nagatoro.checks import is_moderator
-from nagatoro.db import Guild
+from nagatoro.checks import is_moderator, cooldown
+from nagatoro import metrics
+from nagatoro.db import Guild, pool_metrics
 
 
 class Management(Cog, command_attrs=dict(ignore_extra=True)):
@@ -24,13 +24,81 @@ class Management(Cog, command_attrs=dict(ignore_extra=True)):
     @command(name="reload", aliases=["r"], hidden=True)
     @is_owner()
     async def reload(self, ctx: Context):
-        """Reload all cogs and commands"""
+        """Reload changed cogs and modules"""
 
-        ctx.bot.reload_cogs()
-        await ctx.send(
-            f"Reloaded **{len(ctx.bot.commands)}** commands "
-            f"from **{len(ctx.bot.cogs)}** modules."
+        result = ctx.bot.reload_cogs()
+        if not (result.changed or result.extensions):
+            return await ctx.send("Nothing changed since the last reload.")
+
+        message = (
+            f"Reloaded **{len(result.extensions)}** cogs and "
+            f"**{len(result.modules)}** modules in {result.seconds * 1000:.0f}ms."
         )
+        if result.skipped:
+            message += (
+                f"\nRestart to apply changes to: "
+                f"{', '.join(f'`{i}`' for i in result.skipped)}"
+            )
+
+        await ctx.send(message)
+
+    @command(name="dbpool", hidden=True)
+    @is_owner()
+    async def db_pool(self, ctx: Context):
+        """Database connection pool usage, of the primary and the replica"""
+
+        embed = Embed(ctx, title="Database pool", color=Color.blue())
+        for name, metrics in pool_metrics.items():
+            stats = metrics.snapshot()
+            embed.add_field(
+                name=name,
+                value=(
+                    f"**Connections**: {stats['size']} ({stats['free']} free)\n"
+                    f"**Pool size**: {stats['minsize']}-{stats['maxsize']}\n"
+                    f"**Checked out**: {stats['checked_out']}\n"
+                    f"**Waiting**: {stats['waiting']}\n"
+                    f"**Acquisitions**: {stats['acquisitions']}\n"
+                    f"**Wait time**: {stats['wait_avg_ms']:.2f}ms avg, "
+                    f"{stats['wait_max_ms']:.2f}ms max"
+                ),
+            )
+
+        await ctx.send(embed=embed)
+
+    @command(name="stats", hidden=True)
+    @is_owner()
+    async def stats(self, ctx: Context):
+        """Command latency and database usage since startup"""
+
+        commands = []
+        for (name,) in list(metrics.command_duration.values):
+            total, count = metrics.command_duration.summary(command=name)
+            queries, _ = metrics.command_db_queries.summary(command=name)
+            db_time, _ = metrics.command_db_time.summary(command=name)
+            errors = metrics.command_errors.values.get((name,), 0)
+            commands.append((count, name, total, queries, db_time, errors))
+
+        embed = Embed(ctx, title="Stats", description="", color=Color.blue())
+        # The 15 most used commands
+        commands = sorted(commands, reverse=True)[:15]
+        for count, name, total, queries, db_time, errors in commands:
+            embed.description += (
+                f"`{name}` **{count}**x, {total / count * 1000:.0f}ms avg, "
+                f"{queries / count:.1f} queries ({db_time / count * 1000:.0f}ms)"
+                + (f", {errors:.0f} errors" if errors else "")
+                + "\n"
+            )
+
+        for (host,) in list(metrics.http_request_duration.values):
+            total, count = metrics.http_request_duration.summary(host=host)
+            embed.add_field(
+                name=host, value=f"{count} requests, {total / count * 1000:.0f}ms avg"
+            )
+
+        if not embed.description:
+            embed.description = "No commands were used yet."
+
+        await ctx.send(embed=embed)
 
     @group(name="prefix", invoke_without_command=True)
     @cooldown(rate=2, per=10, type=BucketType.user)
@@ -58,6 +126,7 @@ class Management(Cog, command_attrs=dict(ignore_extra=True)):
         guild = await Guild.get(id=ctx.guild.id)
         guild.prefix = prefix
         await guild.save()
+        self.bot.guild_settings.invalidate(ctx.guild.id)
 
         await ctx.send(f"Set custom prefix to `{prefix}`")
 
@@ -75,6 +144,7 @@ class Management(Cog, command_attrs=dict(ignore_extra=True)):
 
         guild.prefix = None
         await guild.save()
+        self.bot.guild_settings.invalidate(ctx.guild.id)
 
         await ctx.send(f"Removed prefix from **{ctx.guild.name}**")
 
@@ -108,6 +178,7 @@ class Management(Cog, command_attrs=dict(ignore_extra=True)):
             await ctx.send(f"Enabled level up messages on **{ctx.guild}**")
 
         await guild.save()
+        self.bot.guild_settings.invalidate(ctx.guild.id)
 
 
 def setup(bot):
@@ -1,24 +1,45 @@
+from asyncio import Lock
 from datetime import datetime
-from typing import List
+from typing import List, Union
 
-from discord import Role, User
-from discord.errors import Forbidden, HTTPException
+from discord import Role, User, Guild as DiscordGuild
+from discord.errors import Forbidden, HTTPException, NotFound
 from discord.ext.tasks import loop
 from discord.ext.commands import (
     Cog,
     Context,
     command,
     group,
-    cooldown,
     has_permissions,
     bot_has_permissions,
     BucketType,
+    Greedy,
 )
+from tortoise.expressions import RawSQL
 
-from nagatoro.checks import is_moderator
-from nagatoro.objects import Embed
-from nagatoro.converters import Member, Timedelta
-from nagatoro.db import Guild, User, Moderator, Mute, Warn
+from nagatoro.checks import is_moderator, cooldown
+from nagatoro.objects import Embed, KeysetPaginator
+from nagatoro.utils import BatchExecutor
+from nagatoro.converters import Member, Timedelta, RecentMembers
+from nagatoro.db import Guild, User, Moderator, Mute, Warn, replica
+
+
+def flatten_targets(targets: list) -> list:
+    # Greedy[Union[Member, RecentMembers]] gives members and lists of members
+    members = {}
+    for i in targets:
+        for member in i if isinstance(i, list) else [i]:
+            members[member.id] = member
+
+    return list(members.values())
+
+
+def shorten(text: str, width: int = 250) -> str:
+    # Keeps a full page of reasons under the embed length limits
+    if not text or len(text) <= width:
+        return text
+
+    return f"{text[:width - 3]}..."
 
 
 class Moderation(Cog):
@@ -26,6 +47,7 @@ class Moderation(Cog):
 
     def __init__(self, bot):
         self.bot = bot
+        self._checking_mutes = Lock()
         self.check_mutes.start()
 
     def cog_unload(self):
@@ -39,8 +61,7 @@ class Moderation(Cog):
         Everyone on this list can use moderation commands like `mute` and `warn`.
         """
 
-        moderators = Moderator.filter(guild__id=ctx.guild.id).prefetch_related("user")
-        if await moderators.count() == 0:
+        if not (moderators := await Moderator.filter(guild_id=ctx.guild.id)):
             return await ctx.send(
                 f"There are no moderators on this server. "
                 f"See `{self.bot.config.prefix}help moderators` for more info."
@@ -49,8 +70,8 @@ class Moderation(Cog):
         embed = Embed(ctx, title=f"Moderators of {ctx.guild}", description="")
 
         await ctx.trigger_typing()
-        async for i in moderators:
-            user = await self.bot.fetch_user(i.user.id)
+        for i in moderators:
+            user = await self.bot.fetch_user(i.user_id)
             embed.description += f"**{user}** {f'({i.title})' if i.title else ''}\n"
 
         await ctx.send(embed=embed)
@@ -64,15 +85,13 @@ class Moderation(Cog):
         `title` is optional and can be used to differentiate between moderator postions.
         """
 
-        if await Moderator.get_or_none(
-            user__id=member.id,
-            guild__id=ctx.guild.id,
-        ):
+        if await Moderator.filter(user_id=member.id, guild_id=ctx.guild.id).exists():
             return await ctx.send(f"**{member}** is already a moderator!")
 
         user, _ = await User.get_or_create(id=member.id)
         guild, _ = await Guild.get_or_create(id=ctx.guild.id)
         await Moderator.create(guild=guild, user=user, title=title)
+        self.bot.moderators.invalidate(ctx.guild.id)
 
         await ctx.send(f"Saved **{member}** as a moderator of **{ctx.guild}**.")
 
@@ -87,12 +106,14 @@ class Moderation(Cog):
         `title` is optional and can be used to differentiate between moderator postions.
         """
 
+        await ctx.bot.ensure_chunked(ctx.guild)
         if len(role.members) > 25:
             return await ctx.send("I can't add more than 25 moderators at once!")
 
         guild, _ = await Guild.get_or_create(id=ctx.guild.id)
-        moderators = await Moderator.filter(guild=guild).prefetch_related("user")
-        moderator_ids = [i.user.id for i in moderators]
+        moderator_ids = await Moderator.filter(guild=guild).values_list(
+            "user_id", flat=True
+        )
         new_moderators: List[Member] = []
 
         await ctx.trigger_typing()
@@ -104,6 +125,7 @@ class Moderation(Cog):
             await Moderator.create(guild=guild, user=user, title=title)
             new_moderators.append(i)
 
+        self.bot.moderators.invalidate(ctx.guild.id)
         if len(new_moderators) == 0:
             return await ctx.send("No new moderators were added.")
 
@@ -118,17 +140,14 @@ class Moderation(Cog):
     async def moderators_delete(self, ctx: Context, member: Member):
         """Remove someone from the list of moderators"""
 
-        if not (
-            moderator := await Moderator.get_or_none(
-                user__id=member.id, guild__id=ctx.guild.id
-            )
-        ):
+        moderator = Moderator.filter(user_id=member.id, guild_id=ctx.guild.id)
+        if not await moderator.delete():
             return await ctx.send(
                 f"**{member}** is not a moderator, "
                 f"you can't delete them from the list!"
             )
 
-        await moderator.delete()
+        self.bot.moderators.invalidate(ctx.guild.id)
 
         await ctx.send(f"Removed **{member}** from **{ctx.guild}**'s moderators.")
 
@@ -160,6 +179,7 @@ class Moderation(Cog):
         guild, _ = await Guild.get_or_create(id=ctx.guild.id)
         guild.mute_role = role.id
         await guild.save()
+        self.bot.guild_settings.invalidate(ctx.guild.id)
 
         await ctx.send(f"Set the mute role to **{role.name}**.")
 
@@ -175,6 +195,7 @@ class Moderation(Cog):
         guild, _ = await Guild.get_or_create(id=ctx.guild.id)
         guild.mute_role = None
         await guild.save()
+        self.bot.guild_settings.invalidate(ctx.guild.id)
 
         await ctx.send(f"Removed the mute role from {ctx.guild.name}.")
 
@@ -194,6 +215,7 @@ class Moderation(Cog):
             reason=f"Moderator: {ctx.author}, reason: {reason}",
             delete_message_days=0,
         )
+        self.bot.bans.add(ctx.guild.id, user.id)
 
         if reason:
             ban_message = f"Banned {user}, reason: *{reason}*."
@@ -212,10 +234,16 @@ class Moderation(Cog):
         To get a user's ID, enable Developer Mode under Appearance Settings, right click on the user's name and select "Copy ID".
         """
 
-        if user.id not in [i.user.id for i in await ctx.guild.bans()]:
+        if not await self.bot.bans.is_banned(ctx.guild, user):
             return await ctx.send(f"{user} is not banned.")
 
-        await ctx.guild.unban(user, reason=f"Moderator: {ctx.author}")
+        try:
+            await ctx.guild.unban(user, reason=f"Moderator: {ctx.author}")
+        except NotFound:
+            # Unbanned without the cache seeing it
+            return await ctx.send(f"{user} is not banned.")
+        finally:
+            self.bot.bans.discard(ctx.guild.id, user.id)
 
         await ctx.send(f"Unbanned {user}")
 
@@ -256,18 +284,13 @@ class Moderation(Cog):
         Use the warn id given when muting or viewing someone's warns (the number in square brackets, e.g. [32]).
         """
 
-        if not (warn := await Warn.get_or_none(id=id)):
-            return await ctx.send(f"A Warn with ID **{id}** doesn't exist.")
-
-        await warn.fetch_related("guild")
-        if warn.guild.id != ctx.guild.id:
+        # The guild check is part of the query, warns from other servers
+        # look the same as ones that don't exist.
+        if not await Warn.filter(id=id, guild_id=ctx.guild.id).delete():
             return await ctx.send(
-                f"The warn with id `{id}` is from another server. "
-                f"You can't change or delete it."
+                f"A warn with ID **{id}** doesn't exist on this server."
             )
 
-        await warn.delete()
-
         await ctx.send(f"Removed warn `{id}` from the database.")
 
     @command(name="warns")
@@ -281,28 +304,35 @@ class Moderation(Cog):
         if not member:
             member = ctx.author
 
-        embed = Embed(
-            ctx, title=f"{member.name}'s warns", description="", color=member.color
-        )
+        async def render(warns: List[Warn], page: int) -> Embed:
+            embed = Embed(
+                ctx,
+                title=f"{member.name}'s warns",
+                description="",
+                color=member.color,
+                footer=f"Page {page}",
+            )
+
+            for i in warns:
+                moderator = ctx.bot.get_user(i.moderator)
+                # TODO: Format time and use timezones (settings)
+                embed.description += (
+                    f"`{i.id}` {str(i.when.time())[:-10]} "
+                    f"{i.when.date()} **{moderator}**: *{shorten(i.reason)}*\n"
+                )
+
+            return embed
 
         await ctx.trigger_typing()
-        warns = Warn.filter(user__id=member.id, guild__id=ctx.guild.id)
+        warns = Warn.filter(user_id=member.id, guild_id=ctx.guild.id).using_db(
+            replica()
+        )
 
-        if not await warns.count():
+        if not await KeysetPaginator(ctx, warns, render).send():
             return await ctx.send(
                 f"{member.name} doesn't have any warns on this server."
             )
 
-        async for i in warns:
-            moderator = ctx.bot.get_user(i.moderator)
-            # TODO: Format time and use timezones (settings)
-            embed.description += (
-                f"`{i.id}` {str(i.when.time())[:-10]} "
-                f"{i.when.date()} **{moderator}**: *{i.reason}*\n"
-            )
-
-        await ctx.send(embed=embed)
-
     @group(name="mute", invoke_without_command=True)
     @bot_has_permissions(manage_roles=True)
     @is_moderator()
@@ -317,7 +347,7 @@ class Moderation(Cog):
         """
 
         mute = await Mute.filter(
-            user__id=member.id, guild__id=ctx.guild.id, active=True
+            user_id=member.id, guild_id=ctx.guild.id, active=True
         ).first()
         if mute:
             mute.end += time
@@ -341,6 +371,7 @@ class Moderation(Cog):
             reason=reason,
             end=datetime.utcnow() + time,
         )
+        self.bot.active_mutes.add(ctx.guild.id, member.id)
 
         mute_role = ctx.guild.get_role(guild.mute_role)
         # TODO: Check if member has lower permissions required to mute them
@@ -372,24 +403,31 @@ class Moderation(Cog):
         Use the mute id given when muting or viewing someone's mutes (the number in square brackets, e.g. [64]).
         """
 
-        if not (mute := await Mute.get_or_none(id=id)):
-            return await ctx.send(f"A Mute with ID **{id}** doesn't exist.")
-
-        await mute.fetch_related("guild")
-        if mute.guild.id != ctx.guild.id:
+        if not (
+            mute := await Mute.filter(id=id, guild_id=ctx.guild.id)
+            .select_related("guild")
+            .first()
+        ):
             return await ctx.send(
-                f"The mute with id `{id}` is from another server. "
-                f"You can't change or delete it."
+                f"A mute with ID **{id}** doesn't exist on this server."
             )
 
-        await mute.fetch_related("user")
-        if (member := ctx.guild.get_member(mute.user.id)) in ctx.guild.members:
-            if mute.guild.mute_role:
-                # Don't try to remove the mute role if it was unset in settings
-                mute_role = ctx.guild.get_role(mute.guild.mute_role)
-                await member.remove_roles(mute_role)
+        if mute.active and mute.guild.mute_role:
+            # By id, the member doesn't have to be cached
+            try:
+                await self.bot.http.remove_role(
+                    ctx.guild.id,
+                    mute.user_id,
+                    mute.guild.mute_role,
+                    reason=f"Moderator: {ctx.author}",
+                )
+            except NotFound:
+                # Not on the server anymore, or the role was deleted
+                pass
 
         await mute.delete()
+        if mute.active:
+            self.bot.active_mutes.discard(ctx.guild.id, mute.user_id)
 
         await ctx.send(f"Removed mute `{id}` from the database.")
 
@@ -403,19 +441,21 @@ class Moderation(Cog):
         Manually end someone's mute period.
         """
 
-        mute = await Mute.filter(
-            user__id=member.id, guild__id=ctx.guild.id, active=True
-        ).first()
+        mute = (
+            await Mute.filter(user_id=member.id, guild_id=ctx.guild.id, active=True)
+            .select_related("guild")
+            .first()
+        )
         if not mute:
             return await ctx.send(f"{member.name} is not muted.")
 
-        await mute.fetch_related("guild")
         if mute.guild.mute_role:
             mute_role = ctx.guild.get_role(mute.guild.mute_role)
             await member.remove_roles(mute_role)
 
         mute.active = False
-        await mute.save()
+        await mute.save(update_fields=["active"])
+        self.bot.active_mutes.discard(ctx.guild.id, member.id)
 
         await ctx.send(f"Unmuted **{member.name}**.")
 
@@ -430,115 +470,340 @@ class Moderation(Cog):
         if not member:
             member = ctx.author
 
-        embed = Embed(
-            ctx, title=f"{member.name}'s mutes", description="", color=member.color
-        )
+        async def render(mutes: List[Mute], page: int) -> Embed:
+            embed = Embed(
+                ctx,
+                title=f"{member.name}'s mutes",
+                description="",
+                color=member.color,
+                footer=f"Page {page}",
+            )
+
+            for i in mutes:
+                if not (moderator := self.bot.get_user(i.moderator)):
+                    moderator = await self.bot.fetch_user(i.moderator)
+                embed.description += (
+                    f"`{i.id}` {str(i.start.time())[:-10]} "
+                    f"{i.start.date()} ({str(i.end - i.start)[:-7]}) "
+                    f"**{moderator}**: *{shorten(i.reason) or 'No reason'}* "
+                )
+                # TODO: Format time and use timezones
+                if i.active:
+                    embed.description += "🔴"
+                embed.description += "\n"
+
+            return embed
+
         await ctx.trigger_typing()
+        mutes = Mute.filter(user_id=member.id, guild_id=ctx.guild.id).using_db(
+            replica()
+        )
 
-        mutes = Mute.filter(user__id=member.id, guild__id=ctx.guild.id)
-        if not await mutes.count():
+        if not await KeysetPaginator(ctx, mutes, render).send():
             return await ctx.send(
                 f"{member.name} doesn't have any mutes on this server."
             )
 
-        async for i in mutes:
-            moderator = await self.bot.fetch_user(i.moderator)
-            embed.description += (
-                f"`{i.id}` {str(i.start.time())[:-10]} "
-                f"{i.start.date()} ({str(i.end - i.start)[:-7]}) "
-                f"**{moderator}**: *{i.reason or 'No reason'}* "
-            )
-            # TODO: Format time and use timezones
-            if i.active:
-                embed.description += "🔴"
-            embed.description += "\n"
-
-        await ctx.send(embed=embed)
-
     @mutes.command(name="active")
     @cooldown(rate=2, per=10, type=BucketType.guild)
     async def mutes_active(self, ctx: Context):
         """See active mutes"""
 
-        embed = Embed(ctx, title="Active mutes")
-        await ctx.trigger_typing()
+        async def render(mutes: List[Mute], page: int) -> Embed:
+            embed = Embed(ctx, title="Active mutes", footer=f"Page {page}")
 
-        mutes = Mute.filter(guild__id=ctx.guild.id, active=True)
-        if not await mutes.count():
-            return await ctx.send(f"There are no active mutes in **{ctx.guild.name}**.")
+            for i in mutes:
+                moderator = ctx.guild.get_member(i.moderator)
+                user = ctx.guild.get_member(i.user_id)
 
-        # TODO: Split active mutes into different embeds when more than 10
-        #       and add scrolling (◀️ ▶️)
-        async for i in mutes.prefetch_related("user"):
-            moderator = ctx.guild.get_member(i.moderator)
-            user = ctx.guild.get_member(i.user.id)
+                description = (
+                    f"**Given at**: {str(i.start.time())[:-10]} "
+                    f"{str(i.start.date())[5:]}\n"
+                    f"**Duration**: {str(i.end - i.start)[:-7]}\n"
+                    f"**Moderator**: {moderator.mention if moderator else i.moderator}"
+                )
+                if i.reason:
+                    description += f"\n**Reason**: *{shorten(i.reason)}*"
 
-            description = (
-                f"**Given at**: {str(i.start.time())[:-10]} {str(i.start.date())[5:]}\n"
-                f"**Duration**: {str(i.end - i.start)[:-7]}\n"
-                f"**Moderator**: {moderator.mention}"
-            )
-            if i.reason:
-                description += f"\n**Reason**: *{i.reason}*"
+                embed.add_field(
+                    name=f"{user} [{i.id}]", value=description, inline=False
+                )
 
-            embed.add_field(name=f"{user} [{i.id}]", value=description, inline=False)
+            return embed
 
-        await ctx.send(embed=embed)
+        await ctx.trigger_typing()
+        mutes = Mute.filter(guild_id=ctx.guild.id, active=True).using_db(replica())
+
+        if not await KeysetPaginator(ctx, mutes, render).send():
+            return await ctx.send(f"There are no active mutes in **{ctx.guild.name}**.")
 
     @loop(seconds=10)
     async def check_mutes(self):
-        async for i in Mute.filter(active=True).prefetch_related("guild", "user"):
-            if i.end.timestamp() >= datetime.utcnow().timestamp():
-                continue
+        if not (leader := self.bot.leader).is_leader:
+            # Another process runs these shards' mutes
+            return
 
-            async def end_mute(mute: Mute):
-                mute.active = False
-                await mute.save()
+        # Held for a whole pass, shutdown waits for it before cancelling
+        async with self._checking_mutes:
+            expired = Mute.filter(active=True, end__lt=datetime.utcnow())
+            if shards := leader.shards:
+                # Guilds of other shards are handled by the processes leading
+                # them, the same formula as Bot.owns_guild
+                expired = expired.annotate(
+                    shard=RawSQL(
+                        f"(mutes.guild_id >> 22) % {int(leader.shard_count)}"
+                    )
+                ).filter(shard__in=sorted(shards))
+
+            async for i in expired.select_related("guild"):
+                async def end_mute(mute: Mute):
+                    mute.active = False
+                    await mute.save()
+                    self.bot.active_mutes.discard(mute.guild_id, mute.user_id)
+
+                guild = self.bot.get_guild(i.guild_id)
+                if guild and guild.unavailable:
+                    # Ended once the guild is back
+                    continue
+                if not guild or not (mute_role := guild.get_role(i.guild.mute_role)):
+                    # The bot left or there's no mute role to remove
+                    await end_mute(i)
+                    continue
+
+                # By id, the member doesn't have to be cached
+                try:
+                    await self.bot.http.remove_role(
+                        guild.id, i.user_id, mute_role.id, reason="Mute ended."
+                    )
+                except NotFound:
+                    # Left the server, the mute ended while they were away
+                    await end_mute(i)
+                    continue
+                except Forbidden:
+                    pass
+                except HTTPException:
+                    # Tried again on the next pass
+                    continue
 
-            try:
-                guild = self.bot.get_guild(i.guild.id)
-                assert guild
-                mute_role = guild.get_role(i.guild.mute_role)
-                assert mute_role
-                member = guild.get_member(i.user.id)
-                assert member
-            except (AttributeError, AssertionError):
                 await end_mute(i)
-                continue
 
-            try:
-                await member.remove_roles(mute_role, reason="Mute ended.")
-            except (Forbidden, HTTPException):
-                pass
-
-            await end_mute(i)
+                try:
+                    user = self.bot.get_user(i.user_id) or await self.bot.fetch_user(
+                        i.user_id
+                    )
+                    await user.send(f"Your mute in {guild.name} has ended.")
+                except (Forbidden, HTTPException):
+                    pass
 
-            try:
-                await member.send(f"Your mute in {guild.name} has ended.")
-            except (Forbidden, HTTPException, AttributeError):
-                pass
+    @Cog.listener()
+    async def on_shutdown(self):
+        # Let a running pass finish, a sleeping loop is cancelled right away
+        async with self._checking_mutes:
+            self.check_mutes.cancel()
 
     @Cog.listener()
     async def on_member_join(self, member: Member):
-        mute = await Mute.get_or_none(
-            user__id=member.id, guild__id=member.guild.id, active=True
+        if not self.bot.active_mutes.might_be_muted(member.guild.id, member.id):
+            return
+
+        mute = (
+            await Mute.filter(user_id=member.id, guild_id=member.guild.id, active=True)
+            .select_related("guild")
+            .first()
         )
 
         if not mute:
+            # Stale entry, the mute ended somewhere the index didn't see
+            self.bot.active_mutes.discard(member.guild.id, member.id)
             return
 
         # User joined the guild, has an active mute
         # and doesn't have the mute role, so add it
 
-        await mute.fetch_related("guild")
-        guild = self.bot.get_guild(member.guild.id)
-
-        if not (mute_role := guild.get_role(mute.guild.mute_role)):
+        if not (mute_role := member.guild.get_role(mute.guild.mute_role)):
             return
 
-        if member in guild.members and mute_role not in member.roles:
+        if mute_role not in member.roles:
             await member.add_roles(mute_role)
 
+    @Cog.listener()
+    async def on_member_ban(self, guild: DiscordGuild, user):
+        self.bot.bans.add(guild.id, user.id)
+
+    @Cog.listener()
+    async def on_member_unban(self, guild: DiscordGuild, user):
+        self.bot.bans.discard(guild.id, user.id)
+
+    @Cog.listener()
+    async def on_guild_remove(self, guild: DiscordGuild):
+        self.bot.bans.remove_guild(guild.id)
+        self.bot.guild_settings.invalidate(guild.id)
+        self.bot.moderators.invalidate(guild.id)
+        self.bot.active_mutes.unload(guild.id)
+
+    @group(name="mass", invoke_without_command=True)
+    @is_moderator()
+    async def mass(self, ctx: Context):
+        """Moderate many members at once
+
+        Members can be given by mention, name or ID, or as a join window, e.g. `joined:10m` for everyone who joined in the last 10 minutes.
+        """
+
+        await ctx.send_help(ctx.command)
+
+    @mass.command(name="mute")
+    @bot_has_permissions(manage_roles=True)
+    @cooldown(rate=2, per=30, type=BucketType.guild)
+    async def mass_mute(
+        self,
+        ctx: Context,
+        time: Timedelta,
+        targets: Greedy[Union[Member, RecentMembers]],
+        *,
+        reason: str = None,
+    ):
+        """Mute many members at once
+
+        Members who are already muted are skipped.
+        """
+
+        if not (members := flatten_targets(targets)):
+            return await ctx.send("No members to mute.")
+
+        guild, _ = await Guild.get_or_create(id=ctx.guild.id)
+        if not (mute_role := ctx.guild.get_role(guild.mute_role)):
+            return await ctx.send(
+                f"**{ctx.guild}** has no mute role set. "
+                f"See help for the `muterole` command for more info."
+            )
+
+        ids = [i.id for i in members]
+        muted = set(
+            await Mute.filter(
+                guild_id=ctx.guild.id, user_id__in=ids, active=True
+            ).values_list("user_id", flat=True)
+        )
+        if not (members := [i for i in members if i.id not in muted]):
+            return await ctx.send("All of these members are already muted.")
+
+        ids = [i.id for i in members]
+        existing = set(await User.filter(id__in=ids).values_list("id", flat=True))
+        if missing := [User(id=i) for i in ids if i not in existing]:
+            await User.bulk_create(missing)
+
+        now = datetime.utcnow()
+        await Mute.bulk_create(
+            [
+                Mute(
+                    moderator=ctx.author.id,
+                    user_id=i,
+                    guild_id=ctx.guild.id,
+                    reason=reason,
+                    start=now,
+                    end=now + time,
+                )
+                for i in ids
+            ]
+        )
+        for i in ids:
+            self.bot.active_mutes.add(ctx.guild.id, i)
+
+        embed = Embed(ctx, title="Mass mute", color=mute_role.color)
+        message = await ctx.send(embed=embed)
+        audit_reason = f"Muted by {ctx.author} for {time}, reason: {reason}"
+        done, failed = await BatchExecutor(
+            message, embed, f"Muting {len(members)} members for {time}"
+        ).run(members, lambda i: i.add_roles(mute_role, reason=audit_reason))
+
+        if failed:
+            # Saved up front so a rejoin can't dodge the role while it's being
+            # given out, members who never got it aren't muted. They weren't
+            # muted before either, the only active mutes are the new ones.
+            failed_ids = [i.id for i in failed]
+            await Mute.filter(
+                guild_id=ctx.guild.id, user_id__in=failed_ids, active=True
+            ).delete()
+            for i in failed_ids:
+                self.bot.active_mutes.discard(ctx.guild.id, i)
+
+        embed.description = f"Muted **{len(done)}** members for {time}"
+        if failed:
+            embed.description += (
+                f"\nCouldn't give the mute role to: "
+                f"{', '.join(str(i) for i in failed)}"
+            )
+        if reason:
+            embed.description += f"\nReason: *{reason}*"
+        await message.edit(embed=embed)
+
+    @mass.command(name="ban")
+    @bot_has_permissions(ban_members=True)
+    @has_permissions(ban_members=True)
+    @cooldown(rate=2, per=30, type=BucketType.guild)
+    async def mass_ban(
+        self,
+        ctx: Context,
+        targets: Greedy[Union[Member, RecentMembers]],
+        *,
+        reason: str = None,
+    ):
+        """Ban many members at once
+
+        This command does not delete their messages.
+        """
+
+        if not (members := flatten_targets(targets)):
+            return await ctx.send("No members to ban.")
+
+        async def ban(member):
+            await ctx.guild.ban(
+                user=member,
+                reason=f"Moderator: {ctx.author}, reason: {reason}",
+                delete_message_days=0,
+            )
+            self.bot.bans.add(ctx.guild.id, member.id)
+
+        embed = Embed(ctx, title="Mass ban")
+        message = await ctx.send(embed=embed)
+        done, failed = await BatchExecutor(
+            message, embed, f"Banning {len(members)} members"
+        ).run(members, ban)
+
+        embed.description = f"Banned **{len(done)}** members"
+        if failed:
+            embed.description += (
+                f"\nCouldn't ban: {', '.join(str(i) for i in failed)}"
+            )
+        if reason:
+            embed.description += f"\nReason: *{reason}*"
+        await message.edit(embed=embed)
+
+    @mass.command(name="role")
+    @bot_has_permissions(manage_roles=True)
+    @has_permissions(manage_roles=True)
+    @cooldown(rate=2, per=30, type=BucketType.guild)
+    async def mass_role(
+        self, ctx: Context, role: Role, targets: Greedy[Union[Member, RecentMembers]]
+    ):
+        """Give a role to many members at once"""
+
+        members = [i for i in flatten_targets(targets) if role not in i.roles]
+        if not members:
+            return await ctx.send(f"No members to give **{role.name}** to.")
+
+        embed = Embed(ctx, title="Mass role", color=role.color)
+        message = await ctx.send(embed=embed)
+        done, failed = await BatchExecutor(
+            message, embed, f"Giving {role.name} to {len(members)} members"
+        ).run(members, lambda i: i.add_roles(role, reason=f"By {ctx.author}"))
+
+        embed.description = f"Gave **{role.name}** to **{len(done)}** members"
+        if failed:
+            embed.description += (
+                f"\nCouldn't give it to: {', '.join(str(i) for i in failed)}"
+            )
+        await message.edit(embed=embed)
+
     @check_mutes.before_loop
     async def before_check_mutes(self):
         await self.bot.wait_until_ready()
@@ -9,14 +9,15 @@ from discord.ext.commands import (
     Context,
     command,
     group,
-    cooldown,
     BucketType,
 )
 
+from nagatoro.checks import cooldown
 from nagatoro.converters import Member
 from nagatoro.objects import Embed
 from nagatoro.utils import aenumerate
-from nagatoro.db import Guild, User, Mute, Warn
+from nagatoro.db import User, moderation_summary, replica
+from nagatoro.cache import UserVersionConflict
 
 
 class Social(Cog):
@@ -33,7 +34,7 @@ class Social(Cog):
         if not member:
             member = ctx.author
 
-        user, _ = await User.get_or_create(id=member.id)
+        user = await self.bot.user_cache.get(member.id)
         # Calculate current level progress:
         # (exp - curr lvl req) * 100 / (curr lvl req - next lvl req)
         current_level_exp = (user.level * 4) ** 2
@@ -42,7 +43,7 @@ class Social(Cog):
             (user.exp - current_level_exp) * 100 / (next_level_exp - current_level_exp)
         )
         # Find position of profile in global user ranking
-        rank = (await User.all().order_by("-exp")).index(user)
+        rank = await User.filter(exp__gt=user.exp).using_db(replica()).count()
 
         embed = Embed(ctx, title=f"{member.name}'s profile", color=member.color)
         embed.set_thumbnail(url=member.avatar_url)
@@ -54,13 +55,10 @@ class Social(Cog):
             ("Balance", f"{user.balance} coins"),
         )
 
-        if mutes := await Mute.filter(
-            guild__id=ctx.guild.id, user__id=member.id
-        ).count():
+        mutes, warns = await moderation_summary(ctx.guild.id, member.id)
+        if mutes:
             embed.add_field(name="Mutes", value=str(mutes))
-        if warns := await Warn.filter(
-            guild__id=ctx.guild.id, user__id=member.id
-        ).count():
+        if warns:
             embed.add_field(name="Warns", value=str(warns))
 
         await ctx.send(embed=embed)
@@ -73,7 +71,7 @@ class Social(Cog):
         if not member:
             member = ctx.author
 
-        user, _ = await User.get_or_create(id=member.id)
+        user = await self.bot.user_cache.get(member.id)
         await ctx.send(f"{member.name}'s balance: **{user.balance}**")
 
     @command(name="level", aliases=["lvl"])
@@ -84,7 +82,7 @@ class Social(Cog):
         if not member:
             member = ctx.author
 
-        user, _ = await User.get_or_create(id=member.id)
+        user = await self.bot.user_cache.get(member.id)
         await ctx.send(f"{member.name}'s level: **{user.level}**")
 
     @group(name="ranking", aliases=["top", "baltop"], invoke_without_command=True)
@@ -108,7 +106,9 @@ class Social(Cog):
         embed = Embed(ctx, title="Level Ranking", description="", color=Color.blue())
 
         await ctx.trigger_typing()
-        async for pos, i in aenumerate(User.all().order_by("-exp").limit(10), start=1):
+        async for pos, i in aenumerate(
+            User.all().using_db(replica()).order_by("-exp").limit(10), start=1
+        ):
             user = await self.bot.fetch_user(i.id)
             embed.description += f"{pos}. **{user}**: {i.level} ({i.exp} exp)\n"
 
@@ -123,7 +123,7 @@ class Social(Cog):
 
         await ctx.trigger_typing()
         async for pos, i in aenumerate(
-            User.all().order_by("-balance").limit(10), start=1
+            User.all().using_db(replica()).order_by("-balance").limit(10), start=1
         ):
             user = await self.bot.fetch_user(i.id)
             embed.description += f"{pos}. **{user}**: {i.balance} coins\n"
@@ -144,7 +144,7 @@ class Social(Cog):
         if amount <= 0:
             return await ctx.send("You need to pay at least 1 coin.")
 
-        user, _ = await User.get_or_create(id=ctx.author.id)
+        user = await self.bot.user_cache.get(ctx.author.id)
 
         if user.balance < amount:
             return await ctx.send(
@@ -171,11 +171,15 @@ class Social(Cog):
             embed.description = "Transfer cancelled."
             return await message.edit(embed=embed)
 
-        target_user, _ = await User.get_or_create(id=member.id)
+        target_user = await self.bot.user_cache.get(member.id)
+        if user.balance < amount:
+            # The balance could have changed while waiting for the reaction
+            embed.description = "Transfer cancelled, not enough funds."
+            return await message.edit(embed=embed)
+
         user.balance -= amount
         target_user.balance += amount
-        await user.save()
-        await target_user.save()
+        await self.bot.user_cache.save(user, target_user)
 
         try:
             await message.clear_reactions()
@@ -197,7 +201,7 @@ class Social(Cog):
         if member and member.bot:
             return await ctx.send("You can't give points to a bot!")
 
-        user, _ = await User.get_or_create(id=ctx.author.id)
+        user = await self.bot.user_cache.get(ctx.author.id)
 
         def hours_til_next_daily() -> int:
             return ceil(
@@ -225,14 +229,15 @@ class Social(Cog):
         user.last_daily = datetime.utcnow()
 
         if member:
-            target_user, _ = await User.get_or_create(id=member.id)
+            target_user = await self.bot.user_cache.get(member.id)
         else:
             target_user = user
         target_user.balance += 100 + bonus
 
-        await user.save()
         if user != target_user:
-            await target_user.save()
+            await self.bot.user_cache.save(user, target_user)
+        else:
+            await self.bot.user_cache.save(user)
 
         embed = Embed(ctx, title="Daily", color=ctx.author.color)
         if user == target_user:
@@ -270,44 +275,48 @@ class Social(Cog):
         if ctx.valid:
             return
 
-        user, _ = await User.get_or_create(id=ctx.author.id)
+        user = await self.bot.user_cache.get(ctx.author.id)
         user.exp += 1
-        await user.save()
-
+        bonus = 0
         if user.level != (new_level := floor(sqrt(user.exp) / 4)):
             user.level = new_level
             bonus = floor(sqrt(user.level) * 100)
             user.balance += bonus
-            await user.save()
 
-            if user.level < 5:
-                return
+        try:
+            await self.bot.user_cache.save(user)
+        except UserVersionConflict:
+            # Changed by another process, losing a single message's exp is fine
+            return
 
-            # Level up message, don't send if the guild has them turned off
-            guild, _ = await Guild.get_or_create(id=ctx.guild.id)
-            if not guild.level_up_messages:
-                return
+        if not bonus or user.level < 5:
+            return
 
-            try:
-                await ctx.send(
-                    f"Congrats **{ctx.author.name}**, "
-                    f"you levelled up to **level {user.level}** "
-                    f"and got a bonus of **{bonus} points**."
-                )
-            except Forbidden:
-                pass
+        # Level up message, don't send if the guild has them turned off
+        guild = await self.bot.guild_settings.get(ctx.guild.id)
+        if not guild.level_up_messages:
+            return
+
+        try:
+            await ctx.send(
+                f"Congrats **{ctx.author.name}**, "
+                f"you levelled up to **level {user.level}** "
+                f"and got a bonus of **{bonus} points**."
+            )
+        except Forbidden:
+            pass
 
-            # TODO: Let the admin choose if they want embed or text level ups
-            # embed = Embed(ctx, title="Level up!")
-            # embed.set_thumbnail(url=ctx.author.avatar_url)
-            # embed.description = (
-            #     f"Congratulations, {ctx.author.mention}! "
-            #     f"You have advanced to **level {user.level}** "
-            #     f"and got a bonus of **{bonus} points**."
-            # )
-            #
-            # level_up_message = await ctx.send(embed=embed)
-            # await level_up_message.delete(delay=30)
+        # TODO: Let the admin choose if they want embed or text level ups
+        # embed = Embed(ctx, title="Level up!")
+        # embed.set_thumbnail(url=ctx.author.avatar_url)
+        # embed.description = (
+        #     f"Congratulations, {ctx.author.mention}! "
+        #     f"You have advanced to **level {user.level}** "
+        #     f"and got a bonus of **{bonus} points**."
+        # )
+        #
+        # level_up_message = await ctx.send(embed=embed)
+        # await level_up_message.delete(delay=30)
 
 
 def setup(bot):
@@ -21,6 +21,8 @@ class Utility(Cog):
 
         embed.add_field(name="ID", value=role.id)
 
+        await ctx.bot.ensure_chunked(ctx.guild)
+
         if len(role.members) > 1:
             embed.add_field(name="Members", value=str(len(role.members)))
 
@@ -2,3 +2,4 @@ from .role_converter import Role
 from .user_converter import User
 from .member_converter import Member
 from .timedelta_converter import Timedelta
+from .recent_members_converter import RecentMembers
@@ -8,14 +8,18 @@ class Member(Converter):
     async def convert(self, ctx: Context, argument: str):
         member_id_match = re.match(r"(<@)?(!|)(?P<id>\d+)>?", argument)
 
-        if not member_id_match:
-            member = utils.find(
-                lambda x: x.name.lower() == argument.lower(),
-                ctx.guild.members)
-        else:
-            member = utils.find(
-                lambda x: x.id == int(member_id_match.group("id")),
-                ctx.guild.members)
+        def find():
+            if not member_id_match:
+                return utils.find(
+                    lambda x: x.name.lower() == argument.lower(),
+                    ctx.guild.members)
+
+            return ctx.guild.get_member(int(member_id_match.group("id")))
+
+        if not (member := find()) and not ctx.guild.chunked:
+            # The member list is downloaded the first time it's needed
+            await ctx.bot.ensure_chunked(ctx.guild)
+            member = find()
 
         if not member:
             raise BadArgument(f"Member {argument} not found.")
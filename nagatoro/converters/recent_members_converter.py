@@ -0,0 +1,25 @@
+from datetime import datetime
+from typing import List
+
+from discord import Member
+from discord.ext.commands import Context, Converter
+from discord.ext.commands.errors import BadArgument
+
+from .timedelta_converter import Timedelta
+
+
+class RecentMembers(Converter):
+    """Members who joined in a recent time window, written as `joined:10m`"""
+
+    async def convert(self, ctx: Context, argument: str) -> List[Member]:
+        if not argument.lower().startswith("joined:"):
+            raise BadArgument(f"{argument} is not a join window.")
+
+        since = datetime.utcnow() - await Timedelta().convert(ctx, argument[7:])
+        await ctx.bot.ensure_chunked(ctx.guild)
+
+        return [
+            i
+            for i in ctx.guild.members
+            if not i.bot and i.joined_at and i.joined_at >= since
+        ]
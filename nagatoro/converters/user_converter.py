@@ -9,6 +9,9 @@ class User(Converter):
         user_id_match = re.match(r"<@(!|)(?P<id>\d+)>", argument)
 
         if not user_id_match:
+            if not argument.isdigit():
+                # Names are looked up in the member list
+                await ctx.bot.ensure_chunked(ctx.guild)
             try:
                 member = utils.find(
                     lambda x: x.name.lower() == argument.lower(),
@@ -1 +1,4 @@
-from .database import init_database, Guild, User, Moderator, Mute, Warn
+from .database import init_database, replica, Guild, User, Moderator, Mute, Warn, Lease
+from .queries import moderation_summary, acquire_lease, release_lease
+from .pool import pool_metrics
+from .hooks import instrument_client
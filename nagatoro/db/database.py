@@ -1,10 +1,14 @@
 from datetime import datetime, timedelta
 
 from tortoise import Tortoise
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.exceptions import ConfigurationError
 from tortoise.models import Model
 from tortoise.fields import (
     IntField,
     BigIntField,
+    CharField,
+    FloatField,
     TextField,
     DatetimeField,
     BooleanField,
@@ -13,6 +17,9 @@ from tortoise.fields import (
     ReverseRelation,
 )
 
+from . import migrations
+from .pool import PoolMetrics, pool_metrics
+
 
 class Guild(Model):
     id = BigIntField(pk=True)
@@ -37,6 +44,8 @@ class User(Model):
     balance = IntField(default=0)
     daily_streak = IntField(default=0)
     last_daily = DatetimeField(null=True)
+    # Bumped on every save through the UserCache, see nagatoro.cache
+    version = IntField(default=0)
     mutes: ReverseRelation["Mute"]
     warns: ReverseRelation["Warn"]
 
@@ -138,11 +147,68 @@ class Warn(Model):
         )
 
 
-async def init_database(db_url: str):
+class Lease(Model):
+    name = CharField(pk=True, max_length=255)
+    holder = CharField(max_length=255)
+    # Unix time on the database's clock, see acquire_lease()
+    expires = FloatField()
+
+    class Meta:
+        table = "leases"
+
+    def __str__(self):
+        return f"<Lease name:{self.name} holder:{self.holder} expires:{self.expires}>"
+
+
+async def init_database(
+    db_url: str, replica_url: str = None, create_schema: bool = False
+):
+    """Connect to the database and bring its schema up to date
+
+    `replica_url` is an optional read replica, used for read-only queries
+    that can tolerate replication lag, see replica(). A SQLite replica is
+    taken as a local stand-in and gets its tables here too.
+    With `create_schema` the tables are created from scratch instead,
+    see nagatoro.db.migrations.
+    """
+
     # logging.info("Initializing database connection...")
+    connections = {"default": db_url}
+    if replica_url:
+        connections["replica"] = replica_url
+
     await Tortoise.init(
-        db_url=db_url,
-        modules={"models": [__name__]},
+        config={
+            "connections": connections,
+            "apps": {
+                "models": {"models": [__name__], "default_connection": "default"}
+            },
+        }
     )
-    await Tortoise.generate_schemas()
+    for name in connections:
+        pool_metrics[name] = PoolMetrics()
+        pool_metrics[name].instrument(Tortoise.get_connection(name))
+
+    if create_schema:
+        await migrations.create_schema()
+    else:
+        await migrations.migrate()
+
+    stand_in = replica_url and Tortoise.get_connection("replica")
+    if stand_in and stand_in.capabilities.dialect == "sqlite":
+        # A local stand-in for a replica, no replication brings it the schema
+        await migrations.prepare_stand_in("replica")
     # logging.info("Successfully connected to database")
+
+
+def replica() -> BaseDBAsyncClient:
+    """Connection for read-only queries, the primary if there's no replica
+
+    Use with QuerySet.using_db(). Anything that reads its own writes
+    has to stay on the primary.
+    """
+
+    try:
+        return Tortoise.get_connection("replica")
+    except (KeyError, ConfigurationError):
+        return Tortoise.get_connection("default")
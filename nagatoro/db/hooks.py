@@ -0,0 +1,85 @@
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, FrozenSet
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+
+query_methods = (
+    "execute_query",
+    "execute_query_dict",
+    "execute_insert",
+    "execute_many",
+    "execute_script",
+)
+
+# Callbacks of the queries running in this task, some execute_* methods
+# call each other and would be seen twice.
+_observing: ContextVar[FrozenSet[Callable]] = ContextVar(
+    "observing", default=frozenset()
+)
+
+
+def instrument_client(
+    client: BaseDBAsyncClient,
+    query: Callable[[str, float], None] = None,
+    checkout: Callable = None,
+):
+    """Hook into the queries and connection checkouts of a Tortoise client
+
+    `query(statement, seconds)` is called after every query. `checkout`
+    takes the context manager of a connection checkout and returns one
+    wrapping it, for single queries and transactions alike.
+
+    Transactions run on a client of their own, queries sent through it
+    are passed to `query` too.
+    """
+
+    if query:
+        _observe_queries(client, query)
+
+    if checkout:
+        acquire_connection = client.acquire_connection
+        client.acquire_connection = lambda: checkout(acquire_connection())
+        # A transaction holds its connection until it ends
+        in_transaction = client._in_transaction
+        client._in_transaction = lambda: checkout(in_transaction())
+
+
+def _observe_queries(client: BaseDBAsyncClient, callback: Callable):
+    for name in query_methods:
+        setattr(client, name, _timed(getattr(client, name), callback))
+
+    in_transaction = client._in_transaction
+    client._in_transaction = lambda: _ObservedTransaction(in_transaction(), callback)
+
+
+def _timed(method, callback: Callable):
+    async def timed(query, *args, **kwargs):
+        running = _observing.get()
+        if callback in running:
+            return await method(query, *args, **kwargs)
+
+        token = _observing.set(running | {callback})
+        start = perf_counter()
+        try:
+            return await method(query, *args, **kwargs)
+        finally:
+            callback(str(query), perf_counter() - start)
+            _observing.reset(token)
+
+    return timed
+
+
+class _ObservedTransaction:
+    def __init__(self, context, callback: Callable):
+        self._context = context
+        self._callback = callback
+
+    async def __aenter__(self):
+        client = await self._context.__aenter__()
+        _observe_queries(client, self._callback)
+        return client
+
+    async def __aexit__(self, *exc_info):
+        return await self._context.__aexit__(*exc_info)
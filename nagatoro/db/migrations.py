@@ -0,0 +1,184 @@
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, NamedTuple, Optional
+
+from tortoise import Tortoise
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.exceptions import OperationalError
+from tortoise.transactions import in_transaction
+
+
+log = logging.getLogger(__name__)
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    # Plain SQL that works on every supported backend
+    statements: List[str]
+
+
+class SchemaNotFound(Exception):
+    """Exception raised when the database has no tables yet."""
+
+    def __init__(self):
+        super().__init__(
+            "The database is empty, create the tables with "
+            "`python nagatoro.py create-schema` first."
+        )
+
+
+# Version 1 is the schema from before migrations, as made by generate_schemas.
+# New migrations go at the end, models always reflect the latest version.
+migrations = [
+    Migration(
+        2,
+        "Version column for optimistic user saves",
+        ["ALTER TABLE users ADD COLUMN version INT NOT NULL DEFAULT 0"],
+    ),
+    Migration(
+        3,
+        "Leases for background tasks only one process may run",
+        [
+            "CREATE TABLE leases (name VARCHAR(255) NOT NULL PRIMARY KEY, "
+            "holder VARCHAR(255) NOT NULL, expires DOUBLE NOT NULL)"
+        ],
+    ),
+]
+
+latest_version = migrations[-1].version if migrations else 1
+
+
+async def current_version(connection: BaseDBAsyncClient) -> Optional[int]:
+    try:
+        rows = await connection.execute_query_dict("SELECT version FROM schema_version")
+    except OperationalError:
+        return None
+
+    return rows[0]["version"] if rows else None
+
+
+async def set_version(connection: BaseDBAsyncClient, version: int):
+    await connection.execute_query(
+        f"UPDATE schema_version SET version = {int(version)}"
+    )
+
+
+async def stamp(connection: BaseDBAsyncClient, version: int):
+    await connection.execute_query(
+        "CREATE TABLE schema_version (version INT NOT NULL)"
+    )
+    await connection.execute_query(
+        f"INSERT INTO schema_version (version) VALUES ({int(version)})"
+    )
+
+
+async def detect_legacy_version(connection: BaseDBAsyncClient) -> int:
+    """Version of a database that was set up before migrations existed"""
+
+    try:
+        await connection.execute_query("SELECT id FROM users LIMIT 1")
+    except OperationalError:
+        raise SchemaNotFound()
+
+    try:
+        # Some databases got the column by hand before migrations existed
+        await connection.execute_query("SELECT version FROM users LIMIT 1")
+    except OperationalError:
+        return 1
+
+    return 2
+
+
+@asynccontextmanager
+async def migration_lock(
+    connection: BaseDBAsyncClient,
+) -> AsyncIterator[BaseDBAsyncClient]:
+    """Let one process at a time check the version and migrate
+
+    Cluster workers and overlapping deploys start at the same time, the
+    others wait and find the schema up to date. Use the yielded client,
+    the lock belongs to its connection.
+    """
+
+    dialect = connection.capabilities.dialect
+    if dialect == "sqlite":
+        # Takes the write lock right away, so two processes can't both
+        # read the old version. The database is unlocked on COMMIT.
+        await connection.execute_query("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            await connection.execute_query("ROLLBACK")
+            raise
+        await connection.execute_query("COMMIT")
+    elif dialect == "mysql":
+        # Named locks are held by a session, DDL can't be rolled back anyway
+        async with in_transaction(connection.connection_name) as locked:
+            rows = await locked.execute_query_dict(
+                "SELECT GET_LOCK('nagatoro_migrations', 600) AS locked"
+            )
+            if not rows[0]["locked"]:
+                raise RuntimeError("Timed out waiting for another migration.")
+            try:
+                yield locked
+            finally:
+                await locked.execute_query("SELECT RELEASE_LOCK('nagatoro_migrations')")
+    else:
+        yield connection
+
+
+async def migrate(connection_name: str = "default"):
+    """Apply pending migrations, one query under the lock when up to date"""
+
+    async with migration_lock(Tortoise.get_connection(connection_name)) as connection:
+        if (version := await current_version(connection)) is None:
+            version = await detect_legacy_version(connection)
+            await stamp(connection, version)
+            log.info(f"Existing database detected as schema version {version}")
+
+        for migration in migrations:
+            if migration.version <= version:
+                continue
+
+            log.info(
+                f"Migrating database to version {migration.version}: "
+                f"{migration.description}"
+            )
+            for statement in migration.statements:
+                # Not execute_script, SQLite's would commit the transaction
+                await connection.execute_query(statement)
+            await set_version(connection, migration.version)
+
+    if version > latest_version:
+        log.warning(
+            f"Database schema version {version} is newer than this code "
+            f"({latest_version})"
+        )
+
+
+async def create_schema(connection_name: str = "default"):
+    """Create every table from scratch, at the latest schema version"""
+
+    connection = Tortoise.get_connection(connection_name)
+    if (version := await current_version(connection)) is not None:
+        raise RuntimeError(f"The schema already exists at version {version}.")
+
+    # The models belong to the default connection, the generator picks them
+    # by that client and writes the tables in this connection's dialect
+    generator = connection.schema_generator(Tortoise.get_connection("default"))
+    await connection.execute_script(generator.get_create_schema_sql(safe=False))
+    await stamp(connection, latest_version)
+    log.info(f"Created the {connection_name} schema at version {latest_version}")
+
+
+async def prepare_stand_in(connection_name: str):
+    """Create or migrate the schema of a database nothing replicates to
+
+    For a local stand-in of a read replica, e.g. a second SQLite file.
+    """
+
+    try:
+        await migrate(connection_name)
+    except SchemaNotFound:
+        await create_schema(connection_name)
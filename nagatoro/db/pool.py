@@ -0,0 +1,75 @@
+from time import perf_counter
+from typing import Dict
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from .hooks import instrument_client
+
+
+class _TimedAcquire:
+    def __init__(self, wrapper, metrics: "PoolMetrics"):
+        self._wrapper = wrapper
+        self._metrics = metrics
+
+    async def __aenter__(self):
+        self._metrics.waiting += 1
+        start = perf_counter()
+        try:
+            connection = await self._wrapper.__aenter__()
+        finally:
+            self._metrics.waiting -= 1
+
+        self._metrics.record_acquire(perf_counter() - start)
+        return connection
+
+    async def __aexit__(self, *exc_info):
+        self._metrics.checked_out -= 1
+        return await self._wrapper.__aexit__(*exc_info)
+
+
+class PoolMetrics:
+    """Connection pool utilisation and wait times of a database client
+
+    Every connection checkout is timed, for single queries and for
+    transactions, the pool's size comes from the underlying aiomysql pool.
+    """
+
+    def __init__(self):
+        self.client: BaseDBAsyncClient = None
+        self.acquisitions = 0
+        self.checked_out = 0
+        self.waiting = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def instrument(self, client: BaseDBAsyncClient):
+        self.client = client
+        instrument_client(client, checkout=lambda i: _TimedAcquire(i, self))
+
+    def record_acquire(self, wait: float):
+        self.acquisitions += 1
+        self.checked_out += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+
+    def snapshot(self) -> dict:
+        # The pool is created with the first connection, SQLite has none
+        pool = getattr(self.client, "_pool", None)
+
+        return {
+            "size": getattr(pool, "size", None),
+            "free": getattr(pool, "freesize", None),
+            "minsize": getattr(pool, "minsize", None),
+            "maxsize": getattr(pool, "maxsize", None),
+            "checked_out": self.checked_out,
+            "waiting": self.waiting,
+            "acquisitions": self.acquisitions,
+            "wait_avg_ms": (
+                self.wait_total / self.acquisitions * 1000 if self.acquisitions else 0
+            ),
+            "wait_max_ms": self.wait_max * 1000,
+        }
+
+
+# By connection name, filled in by init_database
+pool_metrics: Dict[str, PoolMetrics] = {}
@@ -0,0 +1,65 @@
+from typing import Tuple
+
+from tortoise.exceptions import IntegrityError
+from tortoise.expressions import F, Q, RawSQL
+
+from .database import Mute, Warn, Lease, replica
+
+
+async def moderation_summary(guild_id: int, user_id: int) -> Tuple[int, int]:
+    """Count a member's mutes and warns in a single query, on the replica"""
+
+    # Ids are cast to int, so formatting them into the query is safe and
+    # avoids the placeholder differences between database backends.
+    condition = f"guild_id = {int(guild_id)} AND user_id = {int(user_id)}"
+    rows = await replica().execute_query_dict(
+        f"SELECT "
+        f"(SELECT COUNT(*) FROM {Mute._meta.db_table} WHERE {condition}) AS mutes, "
+        f"(SELECT COUNT(*) FROM {Warn._meta.db_table} WHERE {condition}) AS warns"
+    )
+
+    return int(rows[0]["mutes"]), int(rows[0]["warns"])
+
+
+# Unix time on the database's clock, lease holders' clocks may disagree
+database_time = {
+    "sqlite": "(julianday('now') - 2440587.5) * 86400.0",
+    "mysql": "UNIX_TIMESTAMP(NOW(6))",
+}
+
+
+async def acquire_lease(name: str, holder: str, ttl: float) -> bool:
+    """Take or renew a lease for `ttl` seconds, False if someone else holds it
+
+    The update only matches a lease this holder has or one that expired, so
+    of two processes trying at once exactly one gets it. Expiry is computed
+    and compared by the database, with a single clock for every holder.
+    """
+
+    now = RawSQL(database_time[Lease._meta.db.capabilities.dialect])
+
+    def take():
+        return (
+            Lease.annotate(now=now)
+            .filter(Q(holder=holder) | Q(expires__lt=F("now")), name=name)
+            .update(holder=holder, expires=F("now") + float(ttl))
+        )
+
+    if await take():
+        return True
+
+    try:
+        # Created expired, the update sets the expiry
+        await Lease.create(name=name, holder=holder, expires=0)
+    except IntegrityError:
+        # Held by someone else, or created by another process just now
+        return False
+
+    # Fails if another process took the new lease in the meantime
+    return bool(await take())
+
+
+async def release_lease(name: str, holder: str):
+    """Give up a lease, so the next process doesn't wait for it to expire"""
+
+    await Lease.filter(name=name, holder=holder).delete()
@@ -0,0 +1,18 @@
+from .registry import Registry, Counter, Gauge, Histogram
+from .instruments import (
+    registry,
+    command_duration,
+    command_errors,
+    command_db_queries,
+    command_db_time,
+    db_query_duration,
+    http_request_duration,
+    loop_lag,
+    loop_stalls,
+    cache_warmup_duration,
+)
+from .commands import track_command, current_invocation
+from .database import instrument_database
+from .http import instrument_discord_http, trace_config
+from .server import start_server
+from .loop import LoopMonitor
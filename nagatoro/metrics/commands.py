@@ -0,0 +1,47 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Optional
+
+from discord.ext.commands import Context
+
+from .instruments import (
+    command_duration,
+    command_errors,
+    command_db_queries,
+    command_db_time,
+)
+
+
+class Invocation:
+    """Database usage of one command invocation"""
+
+    __slots__ = ("queries", "db_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+# Set while a command runs, tasks started by the command inherit it
+current_invocation: ContextVar[Optional[Invocation]] = ContextVar(
+    "current_invocation", default=None
+)
+
+
+@contextmanager
+def track_command(ctx: Context):
+    invocation = Invocation()
+    token = current_invocation.set(invocation)
+    start = perf_counter()
+
+    try:
+        yield invocation
+    finally:
+        current_invocation.reset(token)
+        name = ctx.command.qualified_name
+        command_duration.observe(perf_counter() - start, command=name)
+        command_db_queries.observe(invocation.queries, command=name)
+        command_db_time.observe(invocation.db_time, command=name)
+        if ctx.command_failed:
+            command_errors.inc(command=name)
@@ -0,0 +1,27 @@
+from functools import partial
+
+from tortoise import Tortoise
+from tortoise.exceptions import ConfigurationError
+
+from nagatoro.db import instrument_client
+from .commands import current_invocation
+from .instruments import db_query_duration
+
+
+def _observe(connection_name: str, query: str, elapsed: float):
+    db_query_duration.observe(elapsed, connection=connection_name)
+    if invocation := current_invocation.get():
+        invocation.queries += 1
+        invocation.db_time += elapsed
+
+
+def instrument_database(connection_names=("default", "replica")):
+    """Time every query sent through the given Tortoise connections"""
+
+    for name in connection_names:
+        try:
+            connection = Tortoise.get_connection(name)
+        except (KeyError, ConfigurationError):
+            continue
+
+        instrument_client(connection, query=partial(_observe, name))
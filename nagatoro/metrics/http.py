@@ -0,0 +1,45 @@
+from time import perf_counter
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+from aiohttp import TraceConfig
+from discord.http import HTTPClient
+
+from .instruments import http_request_duration
+
+
+async def _on_request_start(session, context: SimpleNamespace, params):
+    context.start = perf_counter()
+
+
+async def _on_request_end(session, context: SimpleNamespace, params):
+    http_request_duration.observe(
+        perf_counter() - context.start, host=params.url.host
+    )
+
+
+def trace_config() -> TraceConfig:
+    """Times requests of an aiohttp session, per host"""
+
+    config = TraceConfig()
+    config.on_request_start.append(_on_request_start)
+    config.on_request_end.append(_on_request_end)
+    config.on_request_exception.append(_on_request_end)
+    return config
+
+
+def instrument_discord_http(http: HTTPClient):
+    """Times Discord API requests, rate limit waits included"""
+
+    request = http.request
+
+    async def timed(route, **kwargs):
+        start = perf_counter()
+        try:
+            return await request(route, **kwargs)
+        finally:
+            http_request_duration.observe(
+                perf_counter() - start, host=urlsplit(route.url).hostname
+            )
+
+    http.request = timed
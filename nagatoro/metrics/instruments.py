@@ -0,0 +1,82 @@
+from nagatoro.db import pool_metrics
+from .registry import Registry, Counter, Gauge, Histogram
+
+
+registry = Registry()
+
+command_duration = registry.register(
+    Histogram(
+        "nagatoro_command_duration_seconds",
+        "Time from a command's checks to its end, including failures",
+        labels=["command"],
+    )
+)
+command_errors = registry.register(
+    Counter(
+        "nagatoro_command_errors_total",
+        "Command invocations that ended with an error",
+        labels=["command"],
+    )
+)
+command_db_queries = registry.register(
+    Histogram(
+        "nagatoro_command_db_queries",
+        "Database queries per command invocation",
+        labels=["command"],
+        buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34),
+    )
+)
+command_db_time = registry.register(
+    Histogram(
+        "nagatoro_command_db_seconds",
+        "Time spent in database queries per command invocation",
+        labels=["command"],
+    )
+)
+db_query_duration = registry.register(
+    Histogram(
+        "nagatoro_db_query_duration_seconds",
+        "Database query latency",
+        labels=["connection"],
+    )
+)
+http_request_duration = registry.register(
+    Histogram(
+        "nagatoro_http_request_duration_seconds",
+        "Outbound HTTP request latency, Discord's including rate limit waits",
+        labels=["host"],
+    )
+)
+loop_lag = registry.register(
+    Histogram(
+        "nagatoro_event_loop_lag_seconds",
+        "How late the event loop runs a scheduled callback",
+    )
+)
+loop_stalls = registry.register(
+    Counter(
+        "nagatoro_event_loop_stalls_total",
+        "Times the event loop was blocked for longer than the threshold",
+    )
+)
+cache_warmup_duration = registry.register(
+    Histogram(
+        "nagatoro_cache_warmup_seconds",
+        "Time to bulk load a cache for all guilds after startup",
+        labels=["cache"],
+        buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+    )
+)
+registry.register(
+    Gauge(
+        "nagatoro_db_pool",
+        "Database connection pools",
+        lambda: {
+            (name, key): value
+            for name, metrics in pool_metrics.items()
+            for key, value in metrics.snapshot().items()
+            if key in ("size", "free", "maxsize", "checked_out", "waiting")
+        },
+        labels=["connection", "state"],
+    )
+)
@@ -0,0 +1,73 @@
+import asyncio
+import logging
+import sys
+import threading
+import traceback
+from time import monotonic
+
+from .instruments import loop_lag, loop_stalls
+
+
+log = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    """Measures event loop lag and reports the code that blocks the loop
+
+    A task sleeps for `interval` and records how late it wakes up. A watchdog
+    thread checks when that task last ran. If the loop has been stuck for
+    longer than `threshold` seconds, the watchdog logs the running task and
+    the loop thread's stack while the blocking code is still running.
+    """
+
+    def __init__(self, interval: float = 0.5, threshold: float = 0.25):
+        self.interval = interval
+        self.threshold = threshold
+        self._loop: asyncio.AbstractEventLoop = None
+        self._task: asyncio.Task = None
+        self._thread_id: int = None
+        self._last_tick = monotonic()
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Start monitoring the running loop, call from the loop's thread"""
+
+        self._loop = asyncio.get_event_loop()
+        self._thread_id = threading.get_ident()
+        self._last_tick = monotonic()
+        self._task = self._loop.create_task(self._sample())
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+
+    async def _sample(self):
+        while True:
+            start = self._loop.time()
+            await asyncio.sleep(self.interval)
+            loop_lag.observe(max(0.0, self._loop.time() - start - self.interval))
+            self._last_tick = monotonic()
+
+    def _watch(self):
+        reported = False
+
+        while not self._stopped.wait(self.threshold / 2):
+            stalled = monotonic() - self._last_tick - self.interval
+            if stalled < self.threshold:
+                reported = False
+                continue
+            if reported:
+                # One report per stall
+                continue
+
+            reported = True
+            loop_stalls.inc()
+            task = asyncio.current_task(self._loop)
+            frame = sys._current_frames().get(self._thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else ""
+            log.warning(
+                f"Event loop blocked for over {stalled:.3f}s, "
+                f"running {task!r}\n{stack}"
+            )
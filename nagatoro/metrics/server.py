@@ -0,0 +1,28 @@
+import logging
+
+from aiohttp import web
+
+from .instruments import registry
+
+
+log = logging.getLogger(__name__)
+
+
+async def metrics(request: web.Request) -> web.Response:
+    return web.Response(
+        text=registry.render(), content_type="text/plain", charset="utf-8"
+    )
+
+
+async def start_server(host: str, port: int) -> web.AppRunner:
+    """Serve the metrics in the Prometheus text format on /metrics"""
+
+    app = web.Application()
+    app.router.add_get("/metrics", metrics)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    log.info(f"Serving metrics on http://{host}:{port}/metrics")
+
+    return runner
@@ -1,3 +1,4 @@
 from .config import Config
 from .embed import Embed
-from .help_command import HelpCommand
+from .help_command import HelpCommand, HelpPage
+from .paginator import KeysetPaginator
@@ -1,8 +1,33 @@
 from os import getenv
+from typing import Optional
 
+from discord import MemberCacheFlags
 from dotenv import load_dotenv
 
 
+def parse_member_cache_flags(value: Optional[str]) -> Optional[MemberCacheFlags]:
+    """Parse MEMBER_CACHE, e.g. "none" or "joined,voice"
+
+    Returns None when unset, discord.py then picks flags from the intents.
+    """
+
+    if not value:
+        return None
+
+    flags = MemberCacheFlags.none()
+    if value.lower() == "none":
+        return flags
+
+    for flag in value.lower().split(","):
+        setattr(flags, flag.strip(), True)
+
+    return flags
+
+
+def parse_bool(value: str) -> bool:
+    return value.lower() in ("1", "true", "yes", "on")
+
+
 class Config:
     def __init__(self):
         load_dotenv()
@@ -15,4 +40,58 @@ class Config:
         self.db_user: str = getenv("DB_USER", None)
         self.db_passwd: str = getenv("DB_PASSWD", None)
         self.db_name: str = getenv("DB_NAME", None)
+        self.db_minsize: int = int(getenv("DB_MINSIZE", 1))
+        self.db_maxsize: int = int(getenv("DB_MAXSIZE", 10))
+        self.db_pool_recycle: int = int(getenv("DB_POOL_RECYCLE", 3600))
+        self.db_connect_timeout: float = float(getenv("DB_CONNECT_TIMEOUT", 10))
+        # A full URL, mysql:// or sqlite://, overrides the DB_* settings above
+        self.database_url: str = getenv("DATABASE_URL", None) or self.mysql_url()
+        self.replica_db_url: str = getenv("REPLICA_DB_URL", None)
         self.tenor_key: str = getenv("TENOR_KEY", None)
+        self.user_cache_size: int = int(getenv("USER_CACHE_SIZE", 1024))
+        # Guilds whose settings and moderators are kept in memory
+        self.guild_cache_size: int = int(getenv("GUILD_CACHE_SIZE", 10000))
+        # 0 lets Discord recommend the amount of shards
+        self.shard_count: int = int(getenv("SHARD_COUNT", 0)) or None
+        self.clusters: int = int(getenv("CLUSTERS", 1))
+        self.member_cache_flags: Optional[MemberCacheFlags] = parse_member_cache_flags(
+            getenv("MEMBER_CACHE", None)
+        )
+        self.chunk_guilds_at_startup: bool = parse_bool(
+            getenv("CHUNK_GUILDS_AT_STARTUP", "true")
+        )
+        # 0 disables the Prometheus endpoint
+        self.metrics_port: int = int(getenv("METRICS_PORT", 0))
+        self.metrics_host: str = getenv("METRICS_HOST", "127.0.0.1")
+        # Seconds the event loop can be blocked before it's logged, 0 disables
+        self.slow_callback_threshold: float = float(
+            getenv("SLOW_CALLBACK_THRESHOLD", 0.25)
+        )
+        # Import cogs on first use, see `python nagatoro.py manifest`
+        self.lazy_cogs: bool = parse_bool(getenv("LAZY_COGS", "false"))
+        # Seconds running commands and events get to finish when shutting down
+        self.shutdown_timeout: float = float(getenv("SHUTDOWN_TIMEOUT", 30))
+        # SQLite file shared by the processes on one host, cooldowns are
+        # per process without it
+        self.cooldown_db: str = getenv("COOLDOWN_DB", None)
+        self.cooldown_sync_interval: float = float(
+            getenv("COOLDOWN_SYNC_INTERVAL", 1.0)
+        )
+        # Seconds before another process takes over background tasks from
+        # one that stopped responding
+        self.leader_lease_ttl: float = float(getenv("LEADER_LEASE_TTL", 15))
+        # uvloop and orjson, where installed
+        self.fast_runtime: bool = parse_bool(getenv("FAST_RUNTIME", "false"))
+        self.log_level: str = getenv("LOG_LEVEL", "INFO")
+        self.log_json: bool = parse_bool(getenv("LOG_JSON", "false"))
+        # e.g. "discord.gateway=0.1", only applies below WARNING
+        self.log_sampling: str = getenv("LOG_SAMPLING", None)
+
+    def mysql_url(self) -> str:
+        return (
+            f"mysql://{self.db_user}:{self.db_passwd}"
+            f"@{self.db_url}/{self.db_name}"
+            f"?minsize={self.db_minsize}&maxsize={self.db_maxsize}"
+            f"&pool_recycle={self.db_pool_recycle}"
+            f"&connect_timeout={self.db_connect_timeout}"
+        )
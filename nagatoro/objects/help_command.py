@@ -1,12 +1,30 @@
+from typing import Awaitable, Callable, NamedTuple, Optional, Tuple
+
 from discord import Color
 from discord.ext.commands import HelpCommand as BaseHelpCommand
 from nagatoro.objects import Embed
 
 
+# Prefixes differ per guild, the least recently used pages are dropped
+cache_size = 512
+
+
+class HelpPage(NamedTuple):
+    title: str
+    description: Optional[str]
+    # Name, value, inline
+    fields: Tuple[Tuple[str, str, bool], ...] = ()
+
+
 class HelpCommand(BaseHelpCommand):
     def __init__(self):
         super(HelpCommand, self).__init__(verify_checks=False)
 
+    async def prepare_help_command(self, ctx, command=None):
+        # Cogs loaded on first use aren't listed until they're imported
+        ctx.bot.load_all_lazy()
+        await super().prepare_help_command(ctx, command)
+
     def get_opening_note(self):
         prefix = self.clean_prefix
         command_name = self.invoked_with
@@ -35,70 +53,77 @@ class HelpCommand(BaseHelpCommand):
             f"`{self.clean_prefix}{i.qualified_name}` - {i.short_doc}" for i in commands
         )
 
-    async def send_bot_help(self, mapping):
+    async def send_page(self, target: str, render: Callable[[], Awaitable[HelpPage]]):
+        """Send a help page, rendered once per prefix and target
+
+        Targets are commands and cogs that exist, help for anything else
+        goes to send_error_message and isn't cached. The bot clears the
+        cache when cogs are added or removed. The footer and timestamp
+        depend on the invocation and are added every time.
+        """
+
         ctx = self.context
+        cache = ctx.bot.help_cache
+        key = (self.clean_prefix, self.invoked_with, target)
+        if (page := cache.get(key)) is None:
+            page = cache[key] = await render()
+            while len(cache) > cache_size:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+
         embed = Embed(
-            ctx,
-            title="Commands",
-            description=self.get_opening_note(),
-            color=Color.blue(),
+            ctx, title=page.title, description=page.description, color=Color.blue()
         )
+        for name, value, inline in page.fields:
+            embed.add_field(name=name, value=value, inline=inline)
 
-        for cog, commands in mapping.items():
-            if not cog:
-                # Don't show commands without a cog (e.g. the help command)
-                continue
+        await ctx.send(embed=embed)
 
-            category_name = cog.qualified_name
-            filtered_commands = await self.filter_commands(commands)
+    async def send_bot_help(self, mapping):
+        async def render():
+            fields = []
+            for cog, commands in mapping.items():
+                if not cog:
+                    # Don't show commands without a cog (e.g. the help command)
+                    continue
 
-            embed.add_field(
-                name=category_name,
-                value=", ".join(i.name for i in filtered_commands),
-                inline=False,
-            )
+                filtered_commands = await self.filter_commands(commands)
+                value = ", ".join(i.name for i in filtered_commands)
+                fields.append((cog.qualified_name, value, False))
 
-        await ctx.send(embed=embed)
+            return HelpPage("Commands", self.get_opening_note(), tuple(fields))
 
-    async def send_cog_help(self, cog):
-        ctx = self.context
-        embed = Embed(
-            ctx,
-            title=f"{cog.qualified_name} Commands",
-            description=cog.description,
-            color=Color.blue(),
-        )
+        await self.send_page("", render)
 
-        commands = self.get_formatted_commands(
-            await self.filter_commands(cog.get_commands())
-        )
-        embed.add_field(name="Commands", value="\n".join(commands))
+    async def send_cog_help(self, cog):
+        async def render():
+            commands = self.get_formatted_commands(
+                await self.filter_commands(cog.get_commands())
+            )
+            return HelpPage(
+                f"{cog.qualified_name} Commands",
+                cog.description,
+                (("Commands", "\n".join(commands), True),),
+            )
 
-        await ctx.send(embed=embed)
+        await self.send_page(f"cog {cog.qualified_name}", render)
 
     async def send_group_help(self, group):
-        ctx = self.context
-        embed = Embed(
-            ctx,
-            title=f"`{self.get_command_signature(group)}`",
-            description=group.help,
-            color=Color.blue(),
-        )
-
-        commands = self.get_formatted_commands(
-            await self.filter_commands(group.commands)
-        )
-        embed.add_field(name="Commands", value="\n".join(commands))
+        async def render():
+            commands = self.get_formatted_commands(
+                await self.filter_commands(group.commands)
+            )
+            return HelpPage(
+                f"`{self.get_command_signature(group)}`",
+                group.help,
+                (("Commands", "\n".join(commands), True),),
+            )
 
-        await ctx.send(embed=embed)
+        await self.send_page(f"command {group.qualified_name}", render)
 
     async def send_command_help(self, command):
-        ctx = self.context
-        embed = Embed(
-            ctx,
-            title=f"`{self.get_command_signature(command)}`",
-            description=command.help,
-            color=Color.blue(),
-        )
+        async def render():
+            return HelpPage(f"`{self.get_command_signature(command)}`", command.help)
 
-        await ctx.send(embed=embed)
+        await self.send_page(f"command {command.qualified_name}", render)
@@ -0,0 +1,121 @@
+from asyncio import TimeoutError
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from discord import Message
+from discord.errors import Forbidden, NotFound
+from discord.ext.commands import Context
+from tortoise.models import Model
+from tortoise.queryset import QuerySet
+
+from nagatoro.objects import Embed
+
+
+class KeysetPaginator:
+    """Embed pages of database rows, scrolled with reactions
+
+    Rows are read newest first, one page at a time, with queries keyed on the
+    row id instead of an offset. Every page costs one small query no matter
+    how long the history is, and only the current page is kept in memory.
+    """
+
+    previous_emoji = "◀️"
+    next_emoji = "▶️"
+
+    def __init__(
+        self,
+        ctx: Context,
+        queryset: QuerySet,
+        render: Callable[[List[Model], int], Awaitable[Embed]],
+        per_page: int = 10,
+        timeout: int = 60,
+    ):
+        self.ctx = ctx
+        self.queryset = queryset
+        self.render = render
+        self.per_page = per_page
+        self.timeout = timeout
+
+    async def send(self) -> Optional[Message]:
+        """Send the first page, returns None if there are no rows at all"""
+
+        ctx = self.ctx
+        rows, has_next = await self._older_than(None)
+        if not rows:
+            return None
+
+        page = 1
+        message = await ctx.send(embed=await self.render(rows, page))
+
+        if not has_next or not ctx.channel.permissions_for(ctx.me).add_reactions:
+            # Everything fits on one page or there's no way to scroll
+            return message
+
+        await message.add_reaction(self.previous_emoji)
+        await message.add_reaction(self.next_emoji)
+
+        def check(reaction, user):
+            return (
+                user == ctx.author
+                and reaction.message.id == message.id
+                and str(reaction.emoji) in (self.previous_emoji, self.next_emoji)
+            )
+
+        while True:
+            try:
+                reaction, user = await ctx.bot.wait_for(
+                    "reaction_add", timeout=self.timeout, check=check
+                )
+            except TimeoutError:
+                break
+
+            try:
+                await message.remove_reaction(reaction.emoji, user)
+            except (Forbidden, NotFound):
+                # No manage_messages permission
+                pass
+
+            # Rows can be deleted while the pages are open, a page that came
+            # back empty never replaces the one keys are taken from.
+            if str(reaction.emoji) == self.next_emoji:
+                if not has_next:
+                    continue
+                older, older_has_next = await self._older_than(rows[-1].id)
+                if not older:
+                    has_next = False
+                    continue
+                rows, has_next = older, older_has_next
+                page += 1
+            else:
+                if page == 1:
+                    continue
+                if newer := await self._newer_than(rows[0].id):
+                    rows, has_next = newer, True
+                    page -= 1
+                else:
+                    # Everything newer is gone, start over from the newest
+                    rows, has_next = await self._older_than(None)
+                    page = 1
+                    if not rows:
+                        break
+
+            await message.edit(embed=await self.render(rows, page))
+
+        try:
+            await message.clear_reactions()
+        except (Forbidden, NotFound):
+            pass
+
+        return message
+
+    async def _older_than(self, id: Optional[int]) -> Tuple[List[Model], bool]:
+        queryset = self.queryset
+        if id is not None:
+            queryset = queryset.filter(id__lt=id)
+
+        # One extra row tells if there is a next page
+        rows = await queryset.order_by("-id").limit(self.per_page + 1)
+        return rows[: self.per_page], len(rows) > self.per_page
+
+    async def _newer_than(self, id: int) -> List[Model]:
+        rows = await self.queryset.filter(id__gt=id).order_by("id").limit(self.per_page)
+        return rows[::-1]
@@ -3,3 +3,8 @@ from .tenor import get_gif
 from .anilist import anilist
 from .trace import trace
 from .aenumerate import AsyncEnumerator as aenumerate
+from .batch import BatchExecutor
+from .http import get_session, close_session
+from .logs import setup_logging
+from .runtime import enable_fast_runtime, json_loads, json_dumps
+from .leader import LeaderElection
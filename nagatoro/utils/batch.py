@@ -0,0 +1,85 @@
+from asyncio import Lock, gather
+from time import monotonic
+from typing import Awaitable, Callable, Iterable, List, Tuple, TypeVar
+
+from discord import Message
+from discord.errors import Forbidden, HTTPException, NotFound
+
+from nagatoro.objects import Embed
+
+
+T = TypeVar("T")
+
+
+class BatchExecutor:
+    """Run one API action for many targets and report progress in one message
+
+    discord.py already queues requests per rate limit bucket and waits out
+    429s, so a few workers are enough to keep a route busy. Limiting them
+    keeps a mass command from filling the queues every other command uses.
+    Progress edits are throttled, they share the channel's message bucket.
+    """
+
+    def __init__(
+        self,
+        message: Message,
+        embed: Embed,
+        title: str,
+        concurrency: int = 4,
+        interval: float = 2.5,
+    ):
+        self.message = message
+        self.embed = embed
+        self.title = title
+        self.concurrency = concurrency
+        self.interval = interval
+        self.done: List[T] = []
+        self.failed: List[T] = []
+        self._total = 0
+        self._last_report = 0.0
+        self._report_lock = Lock()
+
+    async def run(
+        self, targets: Iterable[T], action: Callable[[T], Awaitable]
+    ) -> Tuple[List[T], List[T]]:
+        targets = list(targets)
+        self._total = len(targets)
+        # Every worker pulls from the same iterator,
+        # so at most `concurrency` actions are in flight.
+        pending = iter(targets)
+
+        async def worker():
+            for target in pending:
+                try:
+                    await action(target)
+                except (Forbidden, NotFound, HTTPException):
+                    self.failed.append(target)
+                else:
+                    self.done.append(target)
+
+                await self.report()
+
+        await gather(*(worker() for _ in range(min(self.concurrency, self._total))))
+        await self.report(force=True)
+
+        return self.done, self.failed
+
+    async def report(self, force: bool = False):
+        if not force and (
+            self._report_lock.locked()
+            or monotonic() - self._last_report < self.interval
+        ):
+            return
+
+        async with self._report_lock:
+            self._last_report = monotonic()
+            finished = len(self.done) + len(self.failed)
+            self.embed.description = (
+                f"{self.title}: **{finished}/{self._total}**"
+                + (f" ({len(self.failed)} failed)" if self.failed else "")
+            )
+
+            try:
+                await self.message.edit(embed=self.embed)
+            except (NotFound, HTTPException):
+                pass
@@ -1,8 +1,6 @@
 from discord.ext.commands import when_mentioned_or, when_mentioned
 from asyncio import TimeoutError
 
-from nagatoro.db import Guild
-
 
 async def get_prefixes(bot, message):
     prefixes = []
@@ -12,7 +10,7 @@ async def get_prefixes(bot, message):
 
     if message.guild:
         try:
-            guild, _ = await Guild.get_or_create(id=message.guild.id)
+            guild = await bot.guild_settings.get(message.guild.id)
             if guild.prefix:
                 prefixes.append(guild.prefix)
         except TimeoutError:
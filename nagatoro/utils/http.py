@@ -0,0 +1,24 @@
+import aiohttp
+
+from nagatoro.metrics import trace_config
+from .runtime import json_dumps
+
+
+_session: aiohttp.ClientSession = None
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Shared session for outside APIs, keeps connections alive between calls"""
+
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            trace_configs=[trace_config()], json_serialize=json_dumps
+        )
+
+    return _session
+
+
+async def close_session():
+    if _session and not _session.closed:
+        await _session.close()
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import os
+import socket
+from time import monotonic
+from typing import Dict, FrozenSet, Iterable, List, Optional
+from uuid import uuid4
+
+from nagatoro.db import acquire_lease, release_lease
+
+
+log = logging.getLogger(__name__)
+
+
+class LeaderElection:
+    """Picks the processes running background tasks, through lease rows
+
+    Every shard has a lease of its own, background tasks handle the guilds
+    of the shards a process leads. A process started without `shard_ids`
+    runs every shard and holds a single lease for all of them.
+
+    Shard ids only mean the same with the same shard count, so processes
+    also share a lease for their layout. The first layout to take it keeps
+    it while any of its processes run, during a switch between layouts
+    (e.g. from one process to clusters) only the old one leads and the new
+    one takes over once the layout lease expires.
+
+    Every process tries to take or renew its leases every `ttl / 3` seconds.
+    A leader that dies is replaced once its leases expire, one that shuts
+    down releases them and is replaced on the next try. Leadership ends here
+    a third of `ttl` before the leases do, so a renewal stuck on the
+    database doesn't leave two leaders.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: float = 15.0,
+        shard_ids: Optional[Iterable[int]] = None,
+        shard_count: Optional[int] = None,
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self.shard_count = shard_count
+        # Lease names by the shard they are for
+        self._leases: Dict[str, Optional[int]]
+        if shard_ids is None:
+            self.layout = "all"
+            self._leases = {f"{name}:all": None}
+        else:
+            self.layout = f"{shard_count} shards"
+            self._leases = {f"{name}:{shard_count}:{i}": i for i in sorted(shard_ids)}
+        self._leader_until: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _leading(self) -> List[str]:
+        now = monotonic()
+        return [name for name, until in self._leader_until.items() if now < until]
+
+    @property
+    def is_leader(self) -> bool:
+        """Whether this process leads any shard"""
+
+        return bool(self._leading())
+
+    @property
+    def shards(self) -> FrozenSet[int]:
+        """Shards led by this process, empty when started without shard ids"""
+
+        return frozenset(
+            shard for i in self._leading() if (shard := self._leases[i]) is not None
+        )
+
+    def start(self):
+        if not self._task:
+            self._task = asyncio.ensure_future(self._campaign())
+
+    async def elect(self):
+        """Take or renew the leases once"""
+
+        started = monotonic()
+        was_leading = set(self._leading())
+        try:
+            acquired = []
+            # Renewed by every process of the layout, leaders or not
+            if await acquire_lease(self.name, self.layout, self.ttl):
+                for name in self._leases:
+                    if await acquire_lease(name, self.holder, self.ttl):
+                        acquired.append(name)
+        except Exception:
+            # Still the leader until the last leases run out here
+            log.exception(f"Renewing the leases for {self.name} failed")
+            return
+
+        self._leader_until = {i: started + self.ttl * 2 / 3 for i in acquired}
+        for name in acquired:
+            if name not in was_leading:
+                log.info(f"Became the leader for {name}")
+        for name in was_leading - set(acquired):
+            log.warning(f"Lost the lease {name}")
+
+    async def _campaign(self):
+        while True:
+            await self.elect()
+            await asyncio.sleep(self.ttl / 3)
+
+    async def stop(self):
+        """Stop campaigning and release the leases, a bot shutdown hook
+
+        The layout lease is shared with the other processes of the layout
+        and expires once none of them renews it.
+        """
+
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+        leading, self._leader_until = self._leading(), {}
+        for name in leading:
+            await release_lease(name, self.holder)
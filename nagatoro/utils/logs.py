@@ -0,0 +1,115 @@
+import json
+import logging
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+from random import random
+from typing import Dict, Optional
+
+from nagatoro.objects import Config
+
+
+TEXT_FORMAT = "%(levelname)s:%(processName)s:%(name)s:%(funcName)s:%(message)s"
+
+
+def parse_sampling(value: Optional[str]) -> Dict[str, float]:
+    """Parse LOG_SAMPLING, e.g. "discord.gateway=0.1,nagatoro.cogs.social=0.5" """
+
+    rates = {}
+    if not value:
+        return rates
+
+    for entry in value.split(","):
+        name, _, rate = entry.partition("=")
+        rates[name.strip()] = float(rate)
+
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of the records below WARNING from chatty loggers
+
+    A rate applies to the logger it names and its children, the most
+    specific name wins.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._resolved: Dict[str, float] = {}
+
+    def rate(self, name: str) -> float:
+        if name not in self._resolved:
+            rate, length = 1.0, -1
+            for prefix, prefix_rate in self.rates.items():
+                matches = name == prefix or name.startswith(f"{prefix}.")
+                if matches and len(prefix) > length:
+                    rate, length = prefix_rate, len(prefix)
+            self._resolved[name] = rate
+
+        return self._resolved[name]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+
+        return random() < self.rate(record.name)
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": record.created,
+            "level": record.levelname,
+            "process": record.processName,
+            "logger": record.name,
+            "function": record.funcName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+
+        return json.dumps(entry)
+
+
+class _LoopQueueHandler(QueueHandler):
+    """Hands records to the writer thread without formatting them
+
+    The queue never leaves the process, so the record and its exc_info can
+    be passed as they are. Only the message is merged with its arguments,
+    they could change before the writer gets to them.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def setup_logging(config: Config) -> QueueListener:
+    """Route all logging through a queue written to stdout by a background thread
+
+    Logging on the event loop costs an enqueue, a slow stdout reader can't
+    stall it. Call `stop()` on the returned listener to flush the queue.
+    """
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(
+        JSONFormatter() if config.log_json else logging.Formatter(TEXT_FORMAT)
+    )
+
+    queue = SimpleQueue()
+    handler = _LoopQueueHandler(queue)
+    if rates := parse_sampling(config.log_sampling):
+        handler.addFilter(SamplingFilter(rates))
+
+    root = logging.getLogger()
+    for old in root.handlers[:]:
+        root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel(config.log_level.upper())
+
+    listener = QueueListener(queue, stream, respect_handler_level=True)
+    listener.start()
+
+    return listener
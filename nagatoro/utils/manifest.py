@@ -0,0 +1,100 @@
+import json
+import logging
+from typing import Dict
+
+from discord.ext.tasks import Loop
+
+from .reloader import digest
+
+
+log = logging.getLogger(__name__)
+
+manifest_path = "nagatoro/cogs/manifest.json"
+
+
+def extension_file(extension: str) -> str:
+    return extension.replace(".", "/") + ".py"
+
+
+def build_manifest(bot) -> Dict[str, dict]:
+    """Describe the loaded extensions' cogs, commands and listeners"""
+
+    manifest = {}
+    for extension in bot.extensions:
+        cogs = [i for i in bot.cogs.values() if i.__module__ == extension]
+        if not cogs:
+            # Nothing to trigger loading it (e.g. Action without a Tenor key)
+            continue
+
+        manifest[extension] = {
+            "digest": digest(extension_file(extension)),
+            "cogs": [i.qualified_name for i in cogs],
+            "commands": sorted(
+                name.lower()
+                for cog in cogs
+                for command in cog.get_commands()
+                for name in (command.name, *command.aliases)
+            ),
+            "listeners": sorted(
+                {name for cog in cogs for name, _ in cog.get_listeners()}
+            ),
+            # Background loops have to start with the bot
+            "eager": any(
+                isinstance(i, Loop) for cog in cogs for i in vars(type(cog)).values()
+            ),
+        }
+
+    return manifest
+
+
+def write_manifest(bot, path: str = manifest_path):
+    with open(path, "w") as file:
+        json.dump(build_manifest(bot), file, indent=2, sort_keys=True)
+        file.write("\n")
+
+
+def create_manifest(config, path: str = manifest_path):
+    """Import every cog and write what LAZY_COGS needs to register them"""
+
+    from nagatoro import Bot
+
+    config.lazy_cogs = False
+    # Cogs set up only with a Tenor key go in the manifest too, the image
+    # is built without one and they'd be imported at startup in production
+    config.tenor_key = config.tenor_key or "manifest"
+    bot = Bot(config)
+    bot.load_cogs()
+    write_manifest(bot, path)
+    for cog in list(bot.cogs):
+        # Stops background loops
+        bot.remove_cog(cog)
+
+
+def lazy_extensions(path: str = manifest_path) -> Dict[str, dict]:
+    """Manifest entries of extensions that can be loaded on first use
+
+    Extensions changed since the manifest was written are left out and
+    loaded at startup like the eager ones.
+    """
+
+    try:
+        with open(path) as file:
+            manifest = json.load(file)
+    except FileNotFoundError:
+        log.warning(f"No cog manifest at {path}, loading all cogs")
+        return {}
+
+    entries = {}
+    for extension, entry in manifest.items():
+        if entry["eager"]:
+            continue
+        try:
+            if digest(extension_file(extension)) != entry["digest"]:
+                log.warning(f"{extension} changed since the manifest was written")
+                continue
+        except FileNotFoundError:
+            continue
+
+        entries[extension] = entry
+
+    return entries
@@ -0,0 +1,153 @@
+import ast
+import hashlib
+import os
+import sys
+from typing import Dict, Iterable, List, NamedTuple, Set, Tuple
+
+
+# Hold state the bot or other modules keep references to (models, caches,
+# metrics, exception classes caught by the bot), changes need a restart.
+pinned = (
+    "nagatoro.bot",
+    "nagatoro.cache",
+    "nagatoro.checks",
+    "nagatoro.db",
+    "nagatoro.metrics",
+    "nagatoro.utils.http",
+    "nagatoro.utils.logs",
+    "nagatoro.utils.reloader",
+    "nagatoro.utils.runtime",
+)
+
+
+class ReloadResult(NamedTuple):
+    changed: List[str]
+    modules: List[str]
+    extensions: List[str]
+    skipped: List[str]
+    seconds: float
+
+
+def is_pinned(module: str) -> bool:
+    # The root package itself only imports the bot
+    return module == "nagatoro" or any(
+        module == i or module.startswith(f"{i}.") for i in pinned
+    )
+
+
+def digest(path: str) -> str:
+    with open(path, "rb") as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+
+class ModuleReloader:
+    """Tracks the files of loaded nagatoro modules
+
+    Files are compared by modification time first and by hash when it
+    changed, so touching a file or saving it unchanged isn't a change.
+    """
+
+    def __init__(self, package: str = "nagatoro"):
+        self.package = package
+        self._files: Dict[str, Tuple[float, str]] = {}
+
+    def modules(self) -> Dict[str, str]:
+        """Loaded modules of the package and their source files"""
+
+        return {
+            name: module.__file__
+            for name, module in list(sys.modules.items())
+            if (name == self.package or name.startswith(f"{self.package}."))
+            and getattr(module, "__file__", None)
+            and module.__file__.endswith(".py")
+        }
+
+    def snapshot(self):
+        self._files = {
+            name: (os.stat(path).st_mtime, digest(path))
+            for name, path in self.modules().items()
+        }
+
+    def changed(self) -> List[str]:
+        changed = []
+        for name, path in self.modules().items():
+            mtime = os.stat(path).st_mtime
+            if name not in self._files:
+                # Imported since the last snapshot, already the current code
+                self._files[name] = (mtime, digest(path))
+                continue
+            if mtime == self._files[name][0]:
+                continue
+
+            current = digest(path)
+            if current == self._files[name][1]:
+                self._files[name] = (mtime, current)
+            else:
+                # Recorded by the next snapshot, once reloading succeeded
+                changed.append(name)
+
+        return changed
+
+    def imports(self) -> Dict[str, Set[str]]:
+        """Package modules each loaded module imports"""
+
+        modules = self.modules()
+        graph = {}
+        for name, path in modules.items():
+            is_package = path.endswith("__init__.py")
+            with open(path, "rb") as file:
+                tree = ast.parse(file.read(), path)
+
+            imported = set()
+            for node in ast.walk(tree):
+                if isinstance(node, ast.Import):
+                    imported.update(i.name for i in node.names)
+                elif isinstance(node, ast.ImportFrom):
+                    base = node.module or ""
+                    if node.level:
+                        parts = name.split(".")
+                        parent = parts if is_package else parts[:-1]
+                        parent = parent[: len(parent) - node.level + 1]
+                        base = ".".join(filter(None, [*parent, base]))
+                    for i in node.names:
+                        # from package import submodule
+                        submodule = f"{base}.{i.name}"
+                        imported.add(submodule if submodule in modules else base)
+
+            graph[name] = {i for i in imported if i in modules and i != name}
+
+        return graph
+
+    def reload_order(self, changed: Iterable[str]) -> List[str]:
+        """The changed modules and everything importing them, dependencies first
+
+        Pinned modules are left out, they aren't reloaded, so modules
+        importing them don't need to be either.
+        """
+
+        graph = self.imports()
+        affected = {i for i in changed if not is_pinned(i)}
+        while True:
+            found = {
+                name
+                for name, imported in graph.items()
+                if name not in affected and not is_pinned(name) and imported & affected
+            }
+            if not found:
+                break
+            affected |= found
+
+        ordered, seen = [], set()
+
+        def visit(name: str):
+            if name in seen:
+                return
+            seen.add(name)
+            for i in sorted(graph.get(name, set()) & affected):
+                visit(i)
+            ordered.append(name)
+
+        for name in sorted(affected):
+            visit(name)
+
+        return ordered
@@ -0,0 +1,92 @@
+import asyncio
+import json
+import logging
+from typing import Any, List
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+log = logging.getLogger(__name__)
+
+
+def _stdlib_dumps(obj: Any) -> str:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=True)
+
+
+def _orjson_dumps(obj: Any) -> str:
+    try:
+        return orjson.dumps(obj).decode()
+    except TypeError:
+        # Integers over 64 bits and other types orjson refuses
+        return _stdlib_dumps(obj)
+
+
+_loads = json.loads
+_dumps = _stdlib_dumps
+
+
+def json_loads(data):
+    """Decode JSON with the codec picked by `enable_fast_runtime`"""
+
+    return _loads(data)
+
+
+def json_dumps(obj: Any) -> str:
+    """Encode JSON compactly with the codec picked by `enable_fast_runtime`"""
+
+    return _dumps(obj)
+
+
+class _DiscordJSON:
+    """Stands in for the json module discord.py decodes payloads with"""
+
+    @staticmethod
+    def loads(data, **kwargs):
+        return _loads(data)
+
+    @staticmethod
+    def dumps(obj, **kwargs):
+        return _dumps(obj)
+
+
+def enable_fast_runtime() -> List[str]:
+    """Switch to uvloop and orjson where installed, returns what was enabled
+
+    Call before creating the event loop. Without either library the bot runs
+    on the stdlib like it would without this mode.
+    """
+
+    global _loads, _dumps
+    import discord.gateway
+    import discord.http
+    import discord.utils
+
+    enabled = []
+
+    if uvloop:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        enabled.append("uvloop")
+    else:
+        log.info("uvloop is not installed, using the default event loop")
+
+    if orjson:
+        _loads, _dumps = orjson.loads, _orjson_dumps
+        # Gateway messages and REST responses are decoded through the json
+        # module these import, requests and sent gateway payloads go
+        # through utils.to_json.
+        discord.gateway.json = _DiscordJSON
+        discord.http.json = _DiscordJSON
+        discord.utils.to_json = _orjson_dumps
+        enabled.append("orjson")
+    else:
+        log.info("orjson is not installed, using the json module")
+
+    return enabled
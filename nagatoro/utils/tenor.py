@@ -1,4 +1,5 @@
-import aiohttp
+from .http import get_session
+from .runtime import json_loads
 
 
 async def get_gif(query: str, api_key: str) -> str:
@@ -7,8 +8,7 @@ async def get_gif(query: str, api_key: str) -> str:
                   f"q={action}&key={api_key}&limit=1&media_filter=basic" \
                   f"&contentfilter=low"
 
-    async with aiohttp.ClientSession() as cs:
-        async with cs.get(request_url) as r:
-            response = await r.json()
+    async with get_session().get(request_url) as r:
+        response = await r.json(loads=json_loads)
 
-            return response["results"][0]["media"][0]["gif"]["url"]
+        return response["results"][0]["media"][0]["gif"]["url"]
@@ -1,13 +1,13 @@
-import aiohttp
+from .http import get_session
+from .runtime import json_loads
 
 
 async def trace(image_url: str) -> dict:
-    async with aiohttp.ClientSession() as cs:
-        async with cs.post(
-                f"https://trace.moe/api/search?url={image_url}") as request:
-            if request.status == 500:
-                return {"errors": "Invalid URL", "code": 500}
+    async with get_session().post(
+            f"https://trace.moe/api/search?url={image_url}") as request:
+        if request.status == 500:
+            return {"errors": "Invalid URL", "code": 500}
 
-            search = await request.json()
+        search = await request.json(loads=json_loads)
 
     return search
@@ -0,0 +1,67 @@
+import asyncio
+import contextvars
+from typing import List
+
+import pytest
+from tortoise import Tortoise
+
+from nagatoro.db import init_database, instrument_client
+
+
+class QueryLog:
+    """Records every statement sent through the default connection"""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    def instrument(self, client):
+        instrument_client(client, query=self._record)
+
+    def _record(self, query: str, elapsed: float):
+        self.statements.append(query)
+
+    def clear(self):
+        self.statements.clear()
+
+    @property
+    def selects(self) -> List[str]:
+        return [i for i in self.statements if i.lstrip().upper().startswith("SELECT")]
+
+
+class Database:
+    """An in-memory SQLite database on a loop of its own
+
+    Tortoise keeps its connections in a context variable, every coroutine
+    runs in the context the database was set up in.
+    """
+
+    def __init__(self, replica_url: str = None):
+        self.replica_url = replica_url
+        self.loop = asyncio.new_event_loop()
+        self.context = contextvars.copy_context()
+        self.queries = QueryLog()
+
+    def run(self, coroutine):
+        task = self.loop.create_task(coroutine, context=self.context)
+        return self.loop.run_until_complete(task)
+
+    def start(self):
+        async def start():
+            await init_database(
+                "sqlite://:memory:", self.replica_url, create_schema=True
+            )
+            self.queries.instrument(Tortoise.get_connection("default"))
+
+        self.run(start())
+
+    def stop(self):
+        self.run(Tortoise.close_connections())
+        self.loop.close()
+
+
+@pytest.fixture
+def db():
+    database = Database()
+    database.start()
+    yield database
+    database.stop()
@@ -0,0 +1,38 @@
+"""Stand-ins for the discord.py objects commands and listeners use"""
+
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from nagatoro.cache import ActiveMuteIndex
+
+
+def fake_bot(**kwargs) -> SimpleNamespace:
+    return SimpleNamespace(
+        active_mutes=ActiveMuteIndex(),
+        http=SimpleNamespace(add_role=AsyncMock(), remove_role=AsyncMock()),
+        **kwargs,
+    )
+
+
+def fake_guild(id: int, roles=()) -> SimpleNamespace:
+    roles = {i.id: i for i in roles}
+    return SimpleNamespace(
+        id=id,
+        name=f"guild {id}",
+        unavailable=False,
+        get_role=roles.get,
+        get_member=lambda _: None,
+        members=[],
+    )
+
+
+def fake_ctx(bot, guild) -> SimpleNamespace:
+    return SimpleNamespace(
+        bot=bot,
+        guild=guild,
+        author=SimpleNamespace(id=1, avatar_url=""),
+        message=SimpleNamespace(created_at=datetime.utcnow()),
+        send=AsyncMock(),
+        trigger_typing=AsyncMock(),
+    )
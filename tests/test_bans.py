@@ -0,0 +1,35 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from discord.errors import NotFound
+
+from nagatoro.cache import BanCache
+from nagatoro.cogs.moderation import Moderation
+
+from tests.fakes import fake_ctx, fake_guild
+
+
+def not_found() -> NotFound:
+    return NotFound(SimpleNamespace(status=404, reason="Not Found"), "Unknown Ban")
+
+
+def test_unban_after_manual_unban():
+    bot = SimpleNamespace(bans=BanCache())
+    guild = fake_guild(1)
+    guild.unban = AsyncMock(side_effect=not_found())
+    ctx = fake_ctx(bot, guild)
+    user = SimpleNamespace(id=2)
+    bot.bans.add(guild.id, user.id)
+
+    cog = Moderation.__new__(Moderation)
+    cog.bot = bot
+    asyncio.run(Moderation.unban.callback(cog, ctx, user))
+
+    ctx.send.assert_awaited_once()
+    assert "not banned" in ctx.send.call_args.args[0]
+
+    # Evicted, the next lookup asks Discord again
+    guild.fetch_ban = AsyncMock(side_effect=not_found())
+    assert not asyncio.run(bot.bans.is_banned(guild, user))
+    guild.fetch_ban.assert_awaited_once()
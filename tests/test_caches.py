@@ -0,0 +1,95 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from nagatoro.cache import ActiveMuteIndex, GuildSettingsCache
+from nagatoro.cache.guild_cache import GuildCache
+from nagatoro.db import Guild, User, Mute
+
+
+class SlowCache(GuildCache[str]):
+    """Queries read `rows` right away and return once `release` is set"""
+
+    def __init__(self, size: int = 10000):
+        super().__init__(size)
+        self.rows = {}
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def _query(self, guild_id):
+        value = self.rows[guild_id]
+        self.started.set()
+        await self.release.wait()
+        return value
+
+    async def _query_many(self, guild_ids):
+        values = {i: self.rows[i] for i in guild_ids}
+        self.started.set()
+        await self.release.wait()
+        return values
+
+
+def test_invalidated_during_get():
+    async def run():
+        cache = SlowCache()
+        cache.rows[1] = "old"
+        lookup = asyncio.ensure_future(cache.get(1))
+        await cache.started.wait()
+
+        # A command saves a new value while the old one is being read
+        cache.rows[1] = "new"
+        cache.invalidate(1)
+        cache.release.set()
+
+        assert await lookup == "old"
+        assert 1 not in cache
+        assert await cache.get(1) == "new"
+
+    asyncio.run(run())
+
+
+def test_invalidated_during_bulk_load():
+    async def run():
+        cache = SlowCache()
+        cache.rows.update({1: "old", 2: "old"})
+        warm_up = asyncio.ensure_future(cache.load([1, 2]))
+        await cache.started.wait()
+
+        cache.rows[1] = "new"
+        cache.invalidate(1)
+        cache.release.set()
+        await warm_up
+
+        assert 1 not in cache and 2 in cache
+        assert await cache.get(1) == "new"
+
+    asyncio.run(run())
+
+
+def test_bounded(db):
+    cache = GuildSettingsCache(size=2)
+    db.run(cache.load([1, 2, 3]))
+    assert len(cache) == 2
+
+    db.run(cache.get(1))
+    assert 1 in cache and 2 not in cache
+
+
+def test_active_mutes_per_guild(db):
+    async def create():
+        guild = await Guild.create(id=1)
+        user = await User.create(id=5)
+        await Mute.create(
+            moderator=1, user=user, guild=guild, end=datetime.utcnow() + timedelta(1)
+        )
+
+    db.run(create())
+    index = ActiveMuteIndex()
+    db.run(index.load([1]))
+
+    assert index.might_be_muted(1, 5)
+    assert not index.might_be_muted(1, 6)
+    # Joined or became available later, not loaded yet
+    assert index.might_be_muted(2, 6)
+
+    index.unload(1)
+    assert index.might_be_muted(1, 6)
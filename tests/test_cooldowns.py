@@ -0,0 +1,63 @@
+import asyncio
+from types import SimpleNamespace
+
+from discord.ext.commands import BucketType, Cooldown
+
+from nagatoro.cache import CooldownStore, SQLiteCooldowns
+from nagatoro.cache import cooldowns
+
+
+def message(user_id: int) -> SimpleNamespace:
+    return SimpleNamespace(author=SimpleNamespace(id=user_id))
+
+
+def test_full_buckets_are_pruned(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cooldowns, "time", lambda: now[0])
+    cooldown = Cooldown(rate=2, per=10, type=BucketType.user)
+    store = CooldownStore()
+
+    for i in range(100):
+        assert not store.hit("profile", cooldown, message(i))
+    store.hit("profile", cooldown, message(0))
+    assert store.hit("profile", cooldown, message(0))
+    assert len(store) == 100
+
+    now[0] += 10
+    store.prune()
+    assert len(store) == 0
+
+
+def test_max_buckets(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cooldowns, "time", lambda: now[0])
+    cooldown = Cooldown(rate=1, per=1, type=BucketType.user)
+    store = CooldownStore(max_buckets=10)
+
+    for i in range(1000):
+        store.hit("profile", cooldown, message(i))
+        now[0] += 0.1
+
+    # Buckets refill within a second, older ones are dropped past the limit
+    assert len(store) <= 20
+
+
+def test_shared_between_stores(tmp_path):
+    path = str(tmp_path / "cooldowns.sqlite3")
+    cooldown = Cooldown(rate=2, per=60, type=BucketType.user)
+
+    async def run():
+        first = CooldownStore(SQLiteCooldowns(path))
+        second = CooldownStore(SQLiteCooldowns(path))
+        assert not first.hit("profile", cooldown, message(1))
+        assert not first.hit("profile", cooldown, message(1))
+        await first.sync()
+        await second.sync()
+        second.hit("profile", cooldown, message(1))
+        await second.sync()
+
+        assert second.hit("profile", cooldown, message(1))
+        await first.close()
+        await second.close()
+
+    asyncio.run(run())
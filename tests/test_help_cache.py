@@ -0,0 +1,80 @@
+import asyncio
+from collections import OrderedDict
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from discord.ext import commands
+
+from nagatoro import Bot
+from nagatoro.objects import Config, HelpCommand, HelpPage
+from nagatoro.objects import help_command
+
+
+def help_for(bot, prefix: str) -> HelpCommand:
+    ctx = SimpleNamespace(
+        bot=bot,
+        guild=None,
+        prefix=prefix,
+        command=None,
+        author=SimpleNamespace(avatar_url=""),
+        message=SimpleNamespace(created_at=datetime.utcnow()),
+        send=AsyncMock(),
+    )
+    command = HelpCommand()
+    command.context = ctx
+    # Set when the bot registers the help command
+    command._command_impl = SimpleNamespace(name="help")
+    return command
+
+
+def test_help_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(help_command, "cache_size", 3)
+    bot = SimpleNamespace(
+        help_cache=OrderedDict(), user=SimpleNamespace(id=1, display_name="bot")
+    )
+    render = AsyncMock(return_value=HelpPage("Commands", None))
+
+    async def run():
+        for prefix in ("a", "b", "c", "a", "d"):
+            await help_for(bot, prefix).send_page("", render)
+
+    asyncio.run(run())
+
+    # "a" was used again, so "b" was the least recently used page
+    assert [key[0] for key in bot.help_cache] == ["c", "a", "d"]
+    assert render.await_count == 4
+
+
+class Greetings(commands.Cog):
+    @commands.command()
+    async def hello(self, ctx):
+        pass
+
+
+def test_adding_or_removing_cogs_renders_pages_again():
+    async def run():
+        bot = Bot(Config())
+        bot.help_command = None
+        # Set on login
+        bot._connection.user = SimpleNamespace(id=1, display_name="bot")
+        help = help_for(bot, "!")
+
+        async def fields():
+            help.context.send.reset_mock()
+            await help.send_bot_help(help.get_bot_mapping())
+            embed = help.context.send.await_args.kwargs["embed"]
+            return [i.name for i in embed.fields]
+
+        before = await fields()
+        bot.add_cog(Greetings())
+        added = await fields()
+        bot.remove_cog("Greetings")
+        removed = await fields()
+        return before, added, removed
+
+    before, added, removed = asyncio.run(run())
+
+    assert "Greetings" not in before
+    assert "Greetings" in added
+    assert "Greetings" not in removed
@@ -0,0 +1,47 @@
+import asyncio
+
+from tortoise.transactions import in_transaction
+
+from nagatoro.db import Guild, instrument_client
+
+
+def test_queries_in_transactions(db):
+    async def queries():
+        async with in_transaction():
+            await Guild.create(id=1)
+            async with in_transaction():
+                await Guild.filter(id=1).update(prefix="?")
+        await Guild.get(id=1)
+
+    db.run(queries())
+
+    assert [i.split()[0].upper() for i in db.queries.statements] == [
+        "INSERT",
+        "UPDATE",
+        "SELECT",
+    ]
+
+
+class Client:
+    """Runs execute_query_dict through execute_query, like the MySQL client"""
+
+    async def execute_query(self, query, values=None):
+        return 0, []
+
+    async def execute_query_dict(self, query, values=None):
+        return (await self.execute_query(query, values))[1]
+
+    execute_insert = execute_many = execute_script = execute_query
+
+    def _in_transaction(self):
+        raise NotImplementedError
+
+
+def test_nested_methods_are_seen_once():
+    client, first, second = Client(), [], []
+    instrument_client(client, query=lambda query, _: first.append(query))
+    instrument_client(client, query=lambda query, _: second.append(query))
+
+    asyncio.run(client.execute_query_dict("SELECT 1"))
+
+    assert first == second == ["SELECT 1"]
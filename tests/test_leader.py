@@ -0,0 +1,95 @@
+from time import time
+
+from nagatoro.db import Lease, acquire_lease, release_lease
+from nagatoro.utils import LeaderElection
+
+
+def test_acquire(db):
+    async def run():
+        return (
+            await acquire_lease("background", "a", 15),
+            await acquire_lease("background", "b", 15),
+            await Lease.get(name="background"),
+        )
+
+    first, second, lease = db.run(run())
+
+    assert first and not second
+    assert lease.holder == "a"
+    # Expiry comes from the database's clock, the same as the test's here
+    assert abs(lease.expires - (time() + 15)) < 5
+
+
+def test_renew(db):
+    async def run():
+        await acquire_lease("background", "a", 15)
+        first = (await Lease.get(name="background")).expires
+        renewed = await acquire_lease("background", "a", 60)
+        return renewed, (await Lease.get(name="background")).expires - first
+
+    renewed, extended = db.run(run())
+
+    assert renewed
+    assert extended > 40
+
+
+def test_expired_lease_is_taken_over(db):
+    async def run():
+        await acquire_lease("background", "a", 15)
+        await Lease.filter(name="background").update(expires=time() - 1)
+        return (
+            await acquire_lease("background", "b", 15),
+            await acquire_lease("background", "a", 15),
+            await Lease.get(name="background"),
+        )
+
+    taken, retaken, lease = db.run(run())
+
+    assert taken and not retaken
+    assert lease.holder == "b"
+
+
+def test_release(db):
+    async def run():
+        await acquire_lease("background", "a", 15)
+        # Only the holder can release a lease
+        await release_lease("background", "b")
+        held = await acquire_lease("background", "b", 15)
+        await release_lease("background", "a")
+        return held, await acquire_lease("background", "b", 15)
+
+    held, taken = db.run(run())
+
+    assert not held and taken
+
+
+def test_leaders_of_shards(db):
+    first = LeaderElection("background", 15, shard_ids=[0, 1], shard_count=4)
+    second = LeaderElection("background", 15, shard_ids=[1, 2], shard_count=4)
+
+    db.run(first.elect())
+    db.run(second.elect())
+
+    assert first.shards == {0, 1}
+    assert second.shards == {2}
+
+
+def test_one_layout_leads_at_a_time(db):
+    single = LeaderElection("background", 15)
+    cluster = LeaderElection("background", 15, shard_ids=[0, 1], shard_count=2)
+
+    db.run(single.elect())
+    db.run(cluster.elect())
+
+    assert single.is_leader
+    assert not cluster.is_leader
+
+    async def shut_down():
+        await single.stop()
+        # Its layout lease isn't released, it expires later on
+        await Lease.filter(name="background").update(expires=time() - 1)
+        await cluster.elect()
+
+    db.run(shut_down())
+
+    assert cluster.shards == {0, 1}
@@ -0,0 +1,47 @@
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from discord.errors import Forbidden
+
+from nagatoro.cogs.moderation import Moderation
+from nagatoro.db import Guild, Mute
+
+from tests.fakes import fake_bot, fake_ctx, fake_guild
+
+
+GUILD_ID, ROLE_ID = 10, 100
+
+
+def member(id: int, add_roles: AsyncMock) -> SimpleNamespace:
+    return SimpleNamespace(id=id, name=f"member {id}", add_roles=add_roles)
+
+
+async def active_mutes():
+    return sorted(await Mute.filter(active=True).values_list("user_id", flat=True))
+
+
+def test_failed_members_are_not_muted(db):
+    db.run(Guild.create(id=GUILD_ID, mute_role=ROLE_ID))
+    guild = fake_guild(GUILD_ID, roles=[SimpleNamespace(id=ROLE_ID, color=0)])
+    bot = fake_bot()
+    db.run(bot.active_mutes.load([GUILD_ID]))
+    ctx = fake_ctx(bot, guild)
+    ctx.send.return_value = SimpleNamespace(edit=AsyncMock())
+    forbidden = Forbidden(SimpleNamespace(status=403, reason="Forbidden"), "")
+    members = [
+        member(1, AsyncMock()),
+        member(2, AsyncMock(side_effect=forbidden)),
+        member(3, AsyncMock()),
+    ]
+
+    cog = Moderation.__new__(Moderation)
+    cog.bot = bot
+    db.run(Moderation.mass_mute.callback(cog, ctx, timedelta(hours=1), members))
+
+    assert db.run(active_mutes()) == [1, 3]
+    assert [bot.active_mutes.might_be_muted(GUILD_ID, i) for i in (1, 2, 3)] == [
+        True,
+        False,
+        True,
+    ]
@@ -0,0 +1,43 @@
+import sqlite3
+import subprocess
+import sys
+
+
+# Migrates the database passed as the first argument and exits
+migrate = """
+import asyncio, sys
+from tortoise import Tortoise
+from nagatoro.db import init_database
+
+async def main():
+    await init_database(f"sqlite://{sys.argv[1]}")
+    await Tortoise.close_connections()
+
+asyncio.run(main())
+"""
+
+
+def test_concurrent_migrations(tmp_path):
+    path = str(tmp_path / "nagatoro.sqlite3")
+    # A database from before migrations existed, at version 1
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE users (id BIGINT NOT NULL PRIMARY KEY)")
+    connection.commit()
+    connection.close()
+
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-c", migrate, path], stderr=subprocess.PIPE, text=True
+        )
+        for _ in range(4)
+    ]
+    for process in processes:
+        _, stderr = process.communicate(timeout=60)
+        assert process.returncode == 0, stderr
+
+    connection = sqlite3.connect(path)
+    assert connection.execute("SELECT version FROM schema_version").fetchall() == [
+        (3,)
+    ]
+    connection.execute("SELECT version FROM users")
+    connection.execute("SELECT name, holder, expires FROM leases")
@@ -0,0 +1,240 @@
+"""Query counts of the moderation commands
+
+Commands that load a row with its guild have to find the row, the guild
+settings they need and check the row belongs to the invoking guild in a
+single query. The others are pinned to their current query counts.
+"""
+
+import re
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from nagatoro.cache import BanCache
+from nagatoro.cogs.moderation import Moderation
+from nagatoro.db import Guild, User, Moderator, Mute, Warn
+
+from tests.fakes import fake_bot, fake_ctx, fake_guild
+
+
+GUILD_ID, OTHER_GUILD_ID, USER_ID, ROLE_ID = 10, 20, 5, 100
+
+
+async def exists(model, **filters) -> bool:
+    return await model.filter(**filters).exists()
+
+
+async def get(model, **filters):
+    return await model.get(**filters)
+
+
+def checks_guild(statement: str) -> bool:
+    where = statement.upper().partition(" WHERE ")[2]
+    return bool(re.search(r"\bGUILD_ID\"?`?\s*=", where))
+
+
+@pytest.fixture
+def rows(db):
+    async def create():
+        guild = await Guild.create(id=GUILD_ID, mute_role=ROLE_ID)
+        await Guild.create(id=OTHER_GUILD_ID, mute_role=ROLE_ID)
+        user = await User.create(id=USER_ID)
+        mute = await Mute.create(
+            moderator=1, user=user, guild=guild, end=datetime.utcnow() + timedelta(1)
+        )
+        warn = await Warn.create(moderator=1, user=user, guild=guild, reason="")
+        return mute, warn
+
+    mute, warn = db.run(create())
+    db.queries.clear()
+    return SimpleNamespace(mute=mute, warn=warn)
+
+
+@pytest.fixture
+def cog():
+    role = SimpleNamespace(id=ROLE_ID, name="muted")
+    guild = fake_guild(GUILD_ID, roles=[role])
+    bot = fake_bot(
+        get_guild=lambda _: guild,
+        get_user=lambda _: None,
+        fetch_user=AsyncMock(return_value="moderator"),
+        bans=BanCache(),
+        moderators=SimpleNamespace(invalidate=lambda _: None),
+        guild_settings=SimpleNamespace(invalidate=lambda _: None),
+        config=SimpleNamespace(prefix="!"),
+    )
+    cog = Moderation.__new__(Moderation)
+    cog.bot = bot
+    return cog
+
+
+def member(guild, roles=(), id=USER_ID):
+    return SimpleNamespace(
+        id=id,
+        name="member",
+        mention="@member",
+        color=0,
+        avatar_url="",
+        send=AsyncMock(),
+        guild=guild,
+        roles=list(roles),
+        add_roles=AsyncMock(),
+        remove_roles=AsyncMock(),
+    )
+
+
+def test_warn_delete(db, rows, cog):
+    ctx = fake_ctx(cog.bot, cog.bot.get_guild(GUILD_ID))
+    db.run(Moderation.warn_delete.callback(cog, ctx, rows.warn.id))
+
+    assert len(db.queries.statements) == 1
+    assert db.queries.statements[0].upper().startswith("DELETE")
+    assert checks_guild(db.queries.statements[0])
+    assert not db.run(exists(Warn, id=rows.warn.id))
+
+
+def test_warn_delete_other_guild(db, rows, cog):
+    ctx = fake_ctx(cog.bot, fake_guild(OTHER_GUILD_ID))
+    db.run(Moderation.warn_delete.callback(cog, ctx, rows.warn.id))
+
+    assert len(db.queries.statements) == 1
+    assert db.run(exists(Warn, id=rows.warn.id))
+
+
+def test_mute_delete(db, rows, cog):
+    ctx = fake_ctx(cog.bot, cog.bot.get_guild(GUILD_ID))
+    db.run(Moderation.mute_delete.callback(cog, ctx, rows.mute.id))
+
+    assert len(db.queries.selects) == 1
+    assert "JOIN" in db.queries.selects[0].upper()
+    assert checks_guild(db.queries.selects[0])
+    assert not db.run(exists(Mute, id=rows.mute.id))
+    # The member isn't cached, the role is removed by id
+    cog.bot.http.remove_role.assert_awaited_once()
+    assert cog.bot.http.remove_role.call_args.args == (GUILD_ID, USER_ID, ROLE_ID)
+
+
+def test_mute_delete_other_guild(db, rows, cog):
+    ctx = fake_ctx(cog.bot, fake_guild(OTHER_GUILD_ID))
+    db.run(Moderation.mute_delete.callback(cog, ctx, rows.mute.id))
+
+    assert len(db.queries.statements) == 1
+    assert db.run(exists(Mute, id=rows.mute.id))
+
+
+def test_unmute(db, rows, cog):
+    ctx = fake_ctx(cog.bot, cog.bot.get_guild(GUILD_ID))
+    db.run(Moderation.unmute.callback(cog, ctx, member=member(ctx.guild)))
+
+    assert len(db.queries.selects) == 1
+    assert "JOIN" in db.queries.selects[0].upper()
+    assert checks_guild(db.queries.selects[0])
+    assert not db.run(get(Mute, id=rows.mute.id)).active
+
+
+def test_on_member_join(db, rows, cog):
+    joined = member(cog.bot.get_guild(GUILD_ID))
+    db.run(cog.on_member_join(joined))
+    joined.add_roles.assert_awaited_once()
+
+    assert len(db.queries.selects) == 1
+    assert "JOIN" in db.queries.selects[0].upper()
+    assert checks_guild(db.queries.selects[0])
+
+
+def test_warn(db, rows, cog):
+    ctx = fake_ctx(cog.bot, cog.bot.get_guild(GUILD_ID))
+    db.run(Moderation.warn.callback(cog, ctx, member(ctx.guild), reason="spam"))
+
+    # Guild and user rows, then the warn
+    assert len(db.queries.statements) == 3
+    assert db.queries.statements[-1].upper().startswith("INSERT")
+
+
+@pytest.mark.parametrize(
+    "command", [Moderation.warns, Moderation.mutes, Moderation.mutes_active]
+)
+def test_history(db, rows, cog, command):
+    ctx = fake_ctx(cog.bot, cog.bot.get_guild(GUILD_ID))
+    if command is Moderation.mutes_active:
+        db.run(command.callback(cog, ctx))
+    else:
+        db.run(command.callback(cog, ctx, member=member(ctx.guild)))
+
+    # One page, fetched with the guild in the WHERE clause
+    assert len(db.queries.statements) == 1
+    assert checks_guild(db.queries.statements[0])
+    assert ctx.send.call_args.kwargs["embed"]
+
+
+def test_mute(db, rows, cog):
+    db.run(User.create(id=USER_ID + 1))
+    db.queries.clear()
+    ctx = fake_ctx(cog.bot, cog.bot.get_guild(GUILD_ID))
+    muted = member(ctx.guild, id=USER_ID + 1)
+    db.run(Moderation.mute.callback(cog, ctx, muted, timedelta(hours=1)))
+
+    # Active mute check, user and guild rows, then the mute
+    assert len(db.queries.statements) == 4
+    assert checks_guild(db.queries.statements[0])
+    assert db.queries.statements[-1].upper().startswith("INSERT")
+    muted.add_roles.assert_awaited_once()
+
+
+def test_mute_extend(db, rows, cog):
+    ctx = fake_ctx(cog.bot, cog.bot.get_guild(GUILD_ID))
+    db.run(Moderation.mute.callback(cog, ctx, member(ctx.guild), timedelta(hours=1)))
+
+    assert len(db.queries.statements) == 2
+    assert db.queries.statements[-1].upper().startswith("UPDATE")
+
+
+def test_ban_and_unban(db, rows, cog):
+    guild = cog.bot.get_guild(GUILD_ID)
+    guild.ban, guild.unban = AsyncMock(), AsyncMock()
+    ctx = fake_ctx(cog.bot, guild)
+    user = SimpleNamespace(id=USER_ID)
+    db.run(Moderation.ban.callback(cog, ctx, user))
+    db.run(Moderation.unban.callback(cog, ctx, user))
+
+    # Bans are kept by Discord and the ban cache
+    assert db.queries.statements == []
+    guild.unban.assert_awaited_once()
+
+
+def test_moderators(db, rows, cog):
+    ctx = fake_ctx(cog.bot, cog.bot.get_guild(GUILD_ID))
+    db.run(Moderation.moderators_add.callback(cog, ctx, member(ctx.guild)))
+    # Existing moderator check, user and guild rows, then the moderator
+    assert len(db.queries.statements) == 4
+    assert db.run(exists(Moderator, user_id=USER_ID, guild_id=GUILD_ID))
+
+    db.queries.clear()
+    db.run(Moderation.moderators.callback(cog, ctx))
+    assert len(db.queries.statements) == 1
+    assert checks_guild(db.queries.statements[0])
+    cog.bot.fetch_user.assert_awaited_once_with(USER_ID)
+
+    db.queries.clear()
+    db.run(Moderation.moderators_delete.callback(cog, ctx, member(ctx.guild)))
+    assert len(db.queries.statements) == 1
+    assert checks_guild(db.queries.statements[0])
+    assert not db.run(exists(Moderator, user_id=USER_ID))
+
+
+def test_mute_role(db, rows, cog):
+    ctx = fake_ctx(cog.bot, cog.bot.get_guild(GUILD_ID))
+    db.run(Moderation.mute_role.callback(cog, ctx))
+    assert len(db.queries.statements) == 1
+    assert "muted" in ctx.send.call_args.args[0]
+
+    for callback, arguments in [
+        (Moderation.mute_role_set.callback, [SimpleNamespace(id=1, name="role")]),
+        (Moderation.mute_role_delete.callback, []),
+    ]:
+        db.queries.clear()
+        db.run(callback(cog, ctx, *arguments))
+        # The guild row, then its update
+        assert len(db.queries.statements) == 2
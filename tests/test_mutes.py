@@ -0,0 +1,110 @@
+from asyncio import Lock
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from discord.errors import HTTPException, NotFound
+
+from nagatoro.cogs.moderation import Moderation
+from nagatoro.db import Guild, User, Mute
+
+from tests.fakes import fake_bot, fake_guild
+
+
+GUILD_ID, USER_ID, ROLE_ID = 10, 5, 100
+
+
+def http_error(cls, status: int):
+    return cls(SimpleNamespace(status=status, reason=""), "")
+
+
+@pytest.fixture
+def expired(db):
+    async def create():
+        guild = await Guild.create(id=GUILD_ID, mute_role=ROLE_ID)
+        user = await User.create(id=USER_ID)
+        return await Mute.create(
+            moderator=1, user=user, guild=guild, end=datetime.utcnow() - timedelta(1)
+        )
+
+    return db.run(create())
+
+
+@pytest.fixture
+def cog():
+    # No members are cached
+    guild = fake_guild(GUILD_ID, roles=[SimpleNamespace(id=ROLE_ID)])
+    user = SimpleNamespace(send=AsyncMock())
+    bot = fake_bot(
+        leader=SimpleNamespace(is_leader=True, shards=frozenset(), shard_count=None),
+        get_guild=lambda _: guild,
+        get_user=lambda _: None,
+        fetch_user=AsyncMock(return_value=user),
+    )
+    cog = Moderation.__new__(Moderation)
+    cog.bot = bot
+    cog._checking_mutes = Lock()
+    return cog
+
+
+async def check_mutes(cog, mute: Mute) -> Mute:
+    await Moderation.check_mutes.coro(cog)
+    return await Mute.get(id=mute.id)
+
+
+def test_uncached_member(db, expired, cog):
+    assert not db.run(check_mutes(cog, expired)).active
+    cog.bot.http.remove_role.assert_awaited_once()
+    assert cog.bot.http.remove_role.call_args.args == (GUILD_ID, USER_ID, ROLE_ID)
+    cog.bot.fetch_user.return_value.send.assert_awaited_once()
+
+
+def test_member_left(db, expired, cog):
+    cog.bot.http.remove_role.side_effect = http_error(NotFound, 404)
+    assert not db.run(check_mutes(cog, expired)).active
+
+
+def test_removing_the_role_failed(db, expired, cog):
+    cog.bot.http.remove_role.side_effect = http_error(HTTPException, 500)
+    assert db.run(check_mutes(cog, expired)).active
+
+
+def test_unavailable_guild(db, expired, cog):
+    cog.bot.get_guild(GUILD_ID).unavailable = True
+    assert db.run(check_mutes(cog, expired)).active
+    cog.bot.http.remove_role.assert_not_awaited()
+
+
+def test_other_shards_are_left_alone(db, expired, cog):
+    async def create():
+        # Guild ids by the shard they're on, out of two
+        ids = {0: 2 << 22, 1: 1 << 22}
+        user = await User.get(id=USER_ID)
+        mutes = {}
+        for shard, guild_id in ids.items():
+            guild = await Guild.create(id=guild_id, mute_role=ROLE_ID)
+            mutes[shard] = await Mute.create(
+                moderator=1, user=user, guild=guild, end=expired.end
+            )
+        return mutes
+
+    mutes = db.run(create())
+    # Shard 0 of two is led here
+    cog.bot.leader.shards, cog.bot.leader.shard_count = frozenset({0}), 2
+    db.queries.clear()
+
+    assert not db.run(check_mutes(cog, mutes[0])).active
+    assert db.run(check_mutes(cog, mutes[1])).active
+    # Filtered by the database, the other shard's mute was never loaded
+    assert "% 2" in db.queries.selects[0]
+
+
+def test_mutes_that_did_not_end_yet(db, expired, cog):
+    async def extend():
+        expired.end = datetime.utcnow() + timedelta(1)
+        await expired.save()
+
+    db.run(extend())
+    assert db.run(check_mutes(cog, expired)).active
+    cog.bot.http.remove_role.assert_not_awaited()
@@ -0,0 +1,129 @@
+from asyncio import TimeoutError
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from nagatoro.db import Guild, User, Warn
+from nagatoro.objects import KeysetPaginator
+
+
+def paging_ctx(presses):
+    """A context whose author presses the reactions in `presses`
+
+    Each press is an emoji and a coroutine function run before it's handled.
+    """
+
+    message = SimpleNamespace(
+        id=1,
+        add_reaction=AsyncMock(),
+        remove_reaction=AsyncMock(),
+        clear_reactions=AsyncMock(),
+        edit=AsyncMock(),
+    )
+    author = SimpleNamespace(id=2)
+    presses = iter(presses)
+
+    async def wait_for(event, timeout, check):
+        try:
+            emoji, before = next(presses)
+        except StopIteration:
+            raise TimeoutError()
+        await before()
+        return SimpleNamespace(emoji=emoji, message=message), author
+
+    return SimpleNamespace(
+        author=author,
+        me=None,
+        channel=SimpleNamespace(
+            permissions_for=lambda _: SimpleNamespace(add_reactions=True)
+        ),
+        bot=SimpleNamespace(wait_for=wait_for),
+        send=AsyncMock(return_value=message),
+    )
+
+
+async def render(rows, page):
+    return page, [i.id for i in rows]
+
+
+async def create_warns(amount: int):
+    guild = await Guild.create(id=1)
+    user = await User.create(id=1)
+    for _ in range(amount):
+        await Warn.create(moderator=1, user=user, guild=guild, reason="")
+
+
+async def paginate(ctx):
+    await KeysetPaginator(ctx, Warn.all(), render).send()
+
+
+def pages(ctx):
+    message = ctx.send.return_value
+    return [ctx.send.call_args.kwargs["embed"]] + [
+        i.kwargs["embed"] for i in message.edit.call_args_list
+    ]
+
+
+def nothing():
+    async def nothing():
+        pass
+
+    return nothing
+
+
+def test_back_after_newer_rows_were_deleted(db):
+    db.run(create_warns(25))
+
+    async def delete_newer():
+        await Warn.filter(id__gt=5).delete()
+
+    ctx = paging_ctx(
+        [
+            (KeysetPaginator.next_emoji, nothing()),
+            (KeysetPaginator.previous_emoji, delete_newer),
+        ]
+    )
+    db.run(paginate(ctx))
+
+    assert pages(ctx) == [
+        (1, list(range(25, 15, -1))),
+        (2, list(range(15, 5, -1))),
+        (1, [5, 4, 3, 2, 1]),
+    ]
+
+
+def test_next_after_older_rows_were_deleted(db):
+    db.run(create_warns(25))
+
+    async def delete_older():
+        await Warn.filter(id__lt=16).delete()
+
+    ctx = paging_ctx(
+        [
+            (KeysetPaginator.next_emoji, delete_older),
+            (KeysetPaginator.next_emoji, nothing()),
+            (KeysetPaginator.previous_emoji, nothing()),
+        ]
+    )
+    db.run(paginate(ctx))
+
+    assert pages(ctx) == [(1, list(range(25, 15, -1)))]
+
+
+def test_everything_deleted(db):
+    db.run(create_warns(15))
+
+    async def delete_all():
+        await Warn.all().delete()
+
+    ctx = paging_ctx(
+        [
+            (KeysetPaginator.next_emoji, nothing()),
+            (KeysetPaginator.previous_emoji, delete_all),
+            (KeysetPaginator.next_emoji, nothing()),
+        ]
+    )
+    db.run(paginate(ctx))
+
+    assert pages(ctx) == [(1, list(range(15, 5, -1))), (2, [5, 4, 3, 2, 1])]
+    # Paging stopped, the third press was never handled
+    assert ctx.send.return_value.remove_reaction.call_count == 2
@@ -0,0 +1,40 @@
+from tortoise.transactions import in_transaction
+
+from nagatoro.db import Guild, pool_metrics, replica
+
+from tests.conftest import Database
+
+
+def test_transactions_are_checkouts(db):
+    metrics = pool_metrics["default"]
+    acquisitions = metrics.acquisitions
+
+    async def transaction():
+        async with in_transaction():
+            assert metrics.checked_out == 1
+            await Guild.create(id=1)
+            await Guild.filter(id=1).update(prefix="?")
+
+    db.run(transaction())
+
+    # One checkout for the whole transaction
+    assert metrics.acquisitions == acquisitions + 1
+    assert metrics.checked_out == 0
+
+
+async def select():
+    await replica().execute_query("SELECT 1")
+
+
+def test_replica_is_instrumented(tmp_path):
+    database = Database(replica_url=f"sqlite://{tmp_path / 'replica.sqlite3'}")
+    database.start()
+    metrics = pool_metrics["replica"]
+    acquisitions = metrics.acquisitions
+    try:
+        database.run(select())
+    finally:
+        database.stop()
+
+    assert metrics.acquisitions == acquisitions + 1
+    assert metrics.checked_out == 0
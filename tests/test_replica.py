@@ -0,0 +1,37 @@
+from nagatoro.db import Guild, User, Warn, replica, moderation_summary
+
+from tests.conftest import Database
+
+
+async def create_warn(on_replica: bool = False):
+    using_db = replica() if on_replica else None
+    guild = await Guild.create(id=1, using_db=using_db)
+    user = await User.create(id=2, using_db=using_db)
+    await Warn.create(moderator=3, guild=guild, user=user, using_db=using_db)
+
+
+async def replica_warns() -> int:
+    return await Warn.filter(user_id=2).using_db(replica()).count()
+
+
+def test_reads_through_a_sqlite_replica(tmp_path):
+    url = f"sqlite://{tmp_path / 'replica.sqlite3'}"
+    database = Database(replica_url=url)
+    database.start()
+    try:
+        database.run(create_warn())
+        # Nothing replicates the primary's rows to a stand-in
+        assert database.run(replica_warns()) == 0
+        assert database.run(moderation_summary(1, 2)) == (0, 0)
+    finally:
+        database.stop()
+
+    # Started again, the existing replica is migrated instead of created
+    database = Database(replica_url=url)
+    database.start()
+    try:
+        database.run(create_warn(on_replica=True))
+        assert database.run(replica_warns()) == 1
+        assert database.run(moderation_summary(1, 2)) == (0, 1)
+    finally:
+        database.stop()